@@ -1,14 +1,23 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from core.database import use_pool
 from .auth import router as auth_router
 from .user import router as user_router
 from .menu import router as menu_router
 from .system import router as system_router
+from .monitor import router as monitor_router
+from .bootstrap import router as bootstrap_router
+from .events import router as events_router
+from .job import router as job_router
 
 # 创建主路由
 api_router = APIRouter(prefix="")
 
-# 注册子路由
-api_router.include_router(auth_router, prefix="/auth", tags=["认证管理"])
-api_router.include_router(user_router, prefix="/user", tags=["用户管理"])
-api_router.include_router(menu_router, prefix="/menu", tags=["菜单管理"])
-api_router.include_router(system_router, prefix="/system", tags=["系统管理"])
+# 注册子路由，按流量类型选择连接池：登录鉴权使用auth，其余使用interactive（重查询在路由上单独指定bulk）
+api_router.include_router(auth_router, prefix="/auth", tags=["认证管理"], dependencies=[Depends(use_pool("auth"))])
+api_router.include_router(user_router, prefix="/user", tags=["用户管理"], dependencies=[Depends(use_pool("interactive"))])
+api_router.include_router(menu_router, prefix="/menu", tags=["菜单管理"], dependencies=[Depends(use_pool("interactive"))])
+api_router.include_router(system_router, prefix="/system", tags=["系统管理"], dependencies=[Depends(use_pool("interactive"))])
+api_router.include_router(job_router, prefix="/system/job", tags=["后台任务"], dependencies=[Depends(use_pool("interactive"))])
+api_router.include_router(bootstrap_router, prefix="", tags=["启动数据"], dependencies=[Depends(use_pool("interactive"))])
+api_router.include_router(monitor_router, prefix="/monitor", tags=["系统监控"], dependencies=[Depends(use_pool("interactive"))])
+api_router.include_router(events_router, prefix="/events", tags=["变更推送"], dependencies=[Depends(use_pool("interactive"))])
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update, inspect
 from typing import List
 import uuid
 
-from core.database import get_db
+from core.database import get_db, AuthSessionLocal
 from core.security import (
     verify_password,
+    password_needs_update,
+    get_password_hash,
     create_access_token,
     create_refresh_token,
     decode_jwt
 )
 from core.config import settings
+from core.singleflight import singleflight
+from core.token_version import token_versions
 from models.user import User
+from models.user_role import UserRole
 from schemas.auth import (
     LoginRequest,
     LoginResponse,
@@ -27,37 +34,83 @@ router = APIRouter()
 # OAuth2密码Bearer模式
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """获取当前用户"""
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    """认证失败异常"""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def get_token_payload(token: str) -> dict:
+    """解析访问令牌，令牌无效时抛出认证失败异常"""
     if not token:
-        raise credentials_exception
+        raise credentials_exception()
     
     payload = decode_jwt(token)
-    if payload is None:
-        raise credentials_exception
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception()
     
-    username: str = payload.get("sub")
-    if username is None:
-        raise credentials_exception
+    return payload
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """获取当前用户
+
+    查询用户后立即关闭会话归还auth连接，不在整个请求期间占用；返回的用户已脱离会话，只能读取已加载的字段
+    """
+    payload = get_token_payload(token)
+    username: str = payload["sub"]
+    
+    # 携带声明的令牌直接根据声明鉴权，只校验内存中的令牌版本号，不查询数据库
+    if settings.token_claims_enabled and "uid" in payload:
+        if not token_versions.is_valid(payload["uid"], payload.get("tv")):
+            raise credentials_exception()
+        user = User(
+            id=payload["uid"],
+            username=username,
+            is_superuser=bool(payload.get("su")),
+            status=True
+        )
+        user.role_ids = payload.get("rids", [])
+        return user
     
     # 查询用户
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
+    async with AuthSessionLocal() as db:
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
     
-    if user is None:
-        raise credentials_exception
+    if user is None or ("tv" in payload and payload["tv"] != user.token_version):
+        raise credentials_exception()
+    
+    return user
+
+async def get_current_user_profile(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """获取完整的当前用户；根据令牌声明构造的用户只含鉴权字段，需要资料时从数据库加载"""
+    if not inspect(current_user).transient:
+        return current_user
     
+    result = await db.execute(select(User).where(User.id == current_user.id))
+    user = result.scalars().first()
+    if user is None:
+        raise credentials_exception()
     return user
 
+async def get_current_superuser(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """获取当前超级管理员，非超级管理员拒绝访问"""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Superuser privileges required",
+        )
+    return current_user
+
 @router.options("/login", status_code=200, response_model=None, include_in_schema=False)
 async def login_options(response: Response):
     """处理登录接口的OPTIONS请求"""
@@ -67,10 +120,35 @@ async def login_options(response: Response):
     response.headers["Access-Control-Allow-Headers"] = "*"
     return response
 
+async def build_token_claims(db: AsyncSession, user: User) -> dict:
+    """构建访问令牌的附加声明，未启用声明令牌时为空"""
+    if not settings.token_claims_enabled:
+        return {}
+    
+    result = await db.execute(select(UserRole.role_id).where(UserRole.user_id == user.id))
+    return {
+        "uid": user.id,
+        "su": bool(user.is_superuser),
+        "rids": list(result.scalars().all()),
+        "tv": user.token_version,
+    }
+
+async def rehash_password(user_id: int, old_hash: str, password: str):
+    """按当前配置重新哈希密码，仅在密码未被其他请求修改时写入"""
+    new_hash = await run_in_threadpool(get_password_hash, password)
+    async with AuthSessionLocal() as db:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.password == old_hash)
+            .values(password=new_hash)
+        )
+        await db.commit()
+
 @router.post("/login", response_model=ResponseBase[LoginResponse])
 async def login(
     login_data: LoginRequest,
     response: Response,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """用户登录"""
@@ -80,8 +158,8 @@ async def login(
     result = await db.execute(select(User).where(User.username == login_data.username))
     user = result.scalars().first()
     
-    # 验证用户和密码
-    if not user or not verify_password(login_data.password, user.password):
+    # 验证用户和密码（哈希计算耗时较长，在线程池中执行以免阻塞事件循环）
+    if not user or not await run_in_threadpool(verify_password, login_data.password, user.password):
         return error_response(
             code=status.HTTP_401_UNAUTHORIZED,
             message="Username or password is incorrect"
@@ -93,11 +171,16 @@ async def login(
             message="User is disabled"
         )
     
+    # 哈希方案或迭代次数已过时，响应返回后在后台升级
+    if password_needs_update(user.password):
+        background_tasks.add_task(rehash_password, user.id, user.password, login_data.password)
+    
     # 创建访问令牌
-    access_token = create_access_token(user.username)
+    claims = await build_token_claims(db, user)
+    access_token = create_access_token(user.username, claims=claims)
     
     # 创建刷新令牌
-    refresh_token = create_refresh_token(user.username)
+    refresh_token = create_refresh_token(user.username, claims={"tv": user.token_version})
     
     # 设置refresh_token到cookie
     response.set_cookie(
@@ -153,8 +236,9 @@ async def refresh_token(
         )
     
     # 查询用户
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
+    async with AuthSessionLocal() as db:
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
     
     if not user or not user.status:
         return error_response(
@@ -162,8 +246,15 @@ async def refresh_token(
             message="User not found or disabled"
         )
     
+    # 令牌版本已递增（禁用、修改角色或密码）的刷新令牌失效
+    if "tv" in payload and payload["tv"] != user.token_version:
+        return error_response(
+            code=status.HTTP_401_UNAUTHORIZED,
+            message="Refresh token has been revoked"
+        )
+    
     # 创建新的访问令牌
-    new_access_token = create_access_token(user.username)
+    new_access_token = create_access_token(user.username, claims=await build_token_claims(db, user))
     
     return success_response(
         data=RefreshTokenResponse(access_token=new_access_token)
@@ -186,6 +277,13 @@ async def get_access_codes(
     current_user: User = Depends(get_current_user)
 ):
     """获取用户权限码"""
+    async def load():
+        return build_access_codes(current_user)
+    
+    return await singleflight.response("auth.codes", current_user.is_superuser, load)
+
+def build_access_codes(user: User) -> List[str]:
+    """根据用户构建权限码"""
     # 这里简化处理，实际应该根据用户角色获取权限码
     codes = [
         "sys:user:list",
@@ -203,8 +301,8 @@ async def get_access_codes(
     ]
     
     # 超级管理员拥有所有权限
-    if current_user.is_superuser:
-        return success_response(data=codes)
+    if user.is_superuser:
+        return codes
     
     # 普通用户根据角色获取权限（这里简化处理）
-    return success_response(data=codes[:4])
+    return codes[:4]
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.future import select
+import asyncio
+
+from core.database import AsyncSessionLocal
+from core.cache_bus import bus
+from core.singleflight import singleflight
+from api.auth import oauth2_scheme, get_token_payload, credentials_exception, build_access_codes
+from api.menu import load_menu_tree
+from api.user import build_user_info
+from models.user import User
+from schemas.user import BootstrapResponse
+from schemas.base import ResponseBase
+from utils.response import success_response
+
+router = APIRouter()
+
+@router.get("/bootstrap", response_model=ResponseBase[BootstrapResponse])
+async def get_bootstrap(token: str = Depends(oauth2_scheme)):
+    """获取前端启动数据，一次返回用户信息、权限码和菜单树"""
+    payload = get_token_payload(token)
+    username = payload["sub"]
+    
+    async def load_user():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User).where(User.username == username))
+            return result.scalars().first()
+    
+    async def load_menus():
+        async with AsyncSessionLocal() as db:
+            return await load_menu_tree(db)
+    
+    # 用户和菜单互不依赖，分别使用连接池中的独立连接并发查询
+    user, menus = await asyncio.gather(
+        load_user(),
+        singleflight.do("bootstrap.menus", bus.version("sys_menu"), load_menus)
+    )
+    
+    if user is None or ("tv" in payload and payload["tv"] != user.token_version):
+        raise credentials_exception()
+    
+    return success_response(data=BootstrapResponse(
+        userInfo=build_user_info(user),
+        accessCodes=build_access_codes(user),
+        menus=menus
+    ))
@@ -0,0 +1,142 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response
+from typing import AsyncIterator, Callable, Optional
+import asyncio
+import json
+import time
+
+from core.events import change_broadcaster, ALL_TOPICS
+from core.config import settings
+from core.token_version import token_versions
+from api.auth import oauth2_scheme, get_token_payload, get_current_user
+from utils.response import error_response
+
+router = APIRouter()
+
+# 客户端断线后的重连间隔（毫秒）
+RETRY_MS = 3000
+
+class EventStreamResponse(Response):
+    """精简的SSE响应：相比StreamingResponse，每个连接只额外使用一个等待断开消息的任务
+
+    生成器在变更或心跳时才被唤醒，连接断开后最迟在下一次心跳时结束并释放。
+    on_close在响应结束时调用一次，包括响应头发送失败、生成器从未开始执行的情况
+    """
+    
+    media_type = "text/event-stream"
+    
+    def __init__(
+        self,
+        content: AsyncIterator[str],
+        headers: Optional[dict] = None,
+        on_close: Optional[Callable[[], None]] = None
+    ):
+        self.body_iterator = content
+        self.status_code = 200
+        self.background = None
+        self.on_close = on_close
+        self.init_headers(headers)
+    
+    async def __call__(self, scope, receive, send):
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+        
+        disconnected: Optional[asyncio.Future] = None
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            disconnected = asyncio.ensure_future(wait_disconnect())
+            async for chunk in self.body_iterator:
+                if disconnected.done():
+                    break
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+            if not disconnected.done():
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if disconnected is not None:
+                disconnected.cancel()
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                if self.on_close is not None:
+                    self.on_close()
+
+def format_event(event: str, seq: int, data: dict) -> str:
+    """格式化一条SSE消息"""
+    return (
+        f"id: {change_broadcaster.event_id(seq)}\n"
+        f"event: {event}\n"
+        f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    )
+
+def token_still_valid(payload: dict) -> bool:
+    """令牌未过期且未被吊销（携带版本号的令牌按内存中的版本号判断）"""
+    if payload.get("exp") and payload["exp"] < time.time():
+        return False
+    if "uid" in payload and "tv" in payload:
+        return token_versions.is_valid(payload["uid"], payload["tv"])
+    return True
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = Query(default=None, description="访问令牌，EventSource无法设置请求头时使用"),
+    header_token: Optional[str] = Depends(oauth2_scheme)
+):
+    """推送菜单、权限和当前用户的变更通知，客户端收到后再重新获取对应数据
+
+    事件change的data为{"topics": [...], "version": ...}，topics取值：
+    menu重新获取菜单，codes重新获取权限码，user重新获取用户信息（可能已被禁用）
+    """
+    token = token or header_token
+    payload = get_token_payload(token)
+    # 只在建立连接时查询一次用户，推送期间不占用数据库连接
+    user = await get_current_user(token)
+    user_id = user.id
+
+    # 检查上限的同时占用名额，由响应结束时归还；在生成器中才占用时，并发建立的连接都能通过检查
+    if not change_broadcaster.try_acquire(settings.sse_max_connections):
+        return error_response(code=503, message="推送连接数已达上限")
+
+    last_event_id = request.headers.get("last-event-id")
+    resumed_seq = change_broadcaster.parse_event_id(last_event_id)
+
+    async def stream():
+        seq = change_broadcaster.seq
+        yield f"retry: {RETRY_MS}\n\n"
+        if last_event_id:
+            # 断线重连：补发期间错过的变更，无法确定时要求全量刷新
+            topics = change_broadcaster.topics_since(resumed_seq, user_id) if resumed_seq is not None else set(ALL_TOPICS)
+            if topics:
+                yield format_event("change", seq, {"topics": sorted(topics), "version": change_broadcaster.event_id(seq)})
+        else:
+            yield format_event("ready", seq, {"version": change_broadcaster.event_id(seq)})
+
+        while not change_broadcaster.closed:
+            await change_broadcaster.wait(seq)
+            if change_broadcaster.seq == seq:
+                # 心跳：同时检查令牌是否过期或被吊销
+                if not token_still_valid(payload):
+                    yield format_event("expired", seq, {})
+                    return
+                yield ": ping\n\n"
+                continue
+
+            topics = change_broadcaster.topics_since(seq, user_id)
+            seq = change_broadcaster.seq
+            if topics:
+                yield format_event("change", seq, {"topics": sorted(topics), "version": change_broadcaster.event_id(seq)})
+
+    return EventStreamResponse(
+        stream(),
+        headers={
+            "Cache-Control": "no-cache",
+            # 禁止nginx缓冲推送内容
+            "X-Accel-Buffering": "no",
+        },
+        on_close=change_broadcaster.release
+    )
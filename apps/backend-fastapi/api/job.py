@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func
+from typing import Dict, Any, Optional
+
+from core.database import get_db
+from core.jobs import job_manager, job_to_dict
+from api.auth import get_current_user
+from models.user import User
+from models.job import Job
+from schemas.base import ResponseBase
+from utils.response import success_response, error_response
+
+router = APIRouter()
+
+@router.get("/list", response_model=ResponseBase[Dict[str, Any]])
+async def get_job_list(
+    page: int = Query(default=1, ge=1, description="页码"),
+    pageSize: int = Query(default=20, ge=1, le=100, description="每页条数"),
+    kind: Optional[str] = Query(default=None, description="任务类型"),
+    status: Optional[str] = Query(default=None, description="任务状态"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取后台任务列表，超级管理员可查看所有任务，其他用户只能查看自己提交的任务"""
+    query = select(Job)
+    if not current_user.is_superuser:
+        query = query.where(Job.created_by == current_user.id)
+    if kind:
+        query = query.where(Job.kind == kind)
+    if status:
+        query = query.where(Job.status == status)
+    
+    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
+    total = count_result.scalar()
+    
+    offset = (page - 1) * pageSize
+    result = await db.execute(query.order_by(Job.id.desc()).offset(offset).limit(pageSize))
+    
+    return success_response(data={
+        "items": [job_to_dict(job) for job in result.scalars().all()],
+        "total": total,
+        "page": page,
+        "pageSize": pageSize
+    })
+
+async def load_job(db: AsyncSession, id: int, current_user: User) -> Optional[Job]:
+    """查询任务，非超级管理员只能访问自己提交的任务"""
+    result = await db.execute(select(Job).where(Job.id == id))
+    job = result.scalars().first()
+    if job is None or (not current_user.is_superuser and job.created_by != current_user.id):
+        return None
+    return job
+
+@router.get("/{id}", response_model=ResponseBase[Dict[str, Any]])
+async def get_job(
+    id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """查询任务状态和进度"""
+    job = await load_job(db, id, current_user)
+    if job is None:
+        return error_response(code=404, message="任务不存在")
+    return success_response(data=job_to_dict(job))
+
+@router.post("/{id}/cancel", response_model=ResponseBase)
+async def cancel_job(
+    id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """取消任务：等待中的任务立即取消，执行中的任务在当前批次完成后停止"""
+    job = await load_job(db, id, current_user)
+    if job is None:
+        return error_response(code=404, message="任务不存在")
+    
+    if not await job_manager.cancel(id):
+        return error_response(code=400, message="任务已结束，无法取消")
+    return success_response(message="已请求取消任务")
@@ -4,11 +4,14 @@ from sqlalchemy.future import select
 from typing import List, Dict, Any
 
 from core.database import get_db
+from core.cache_bus import bus
+from core.singleflight import singleflight
 from api.auth import get_current_user
 from models.menu import Menu
 from models.user import User
 from schemas.base import ResponseBase
 from utils.response import success_response, error_response
+from utils.columnar import columnar_requested, columnar, encode_columnar
 
 router = APIRouter()
 
@@ -36,13 +39,8 @@ async def get_menu_tree(menus: List[Menu], parent_id: int = 0) -> List[Dict[str,
             tree.append(menu_dict)
     return tree
 
-@router.get("/all", response_model=ResponseBase[List[Dict[str, Any]]])
-async def get_all_menus(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """获取所有菜单（树形结构）"""
-    # 查询所有启用的菜单
+async def load_menu_tree(db: AsyncSession) -> List[Dict[str, Any]]:
+    """查询所有启用的菜单并构建菜单树"""
     result = await db.execute(
         select(Menu)
         .where(Menu.status == True)
@@ -51,40 +49,80 @@ async def get_all_menus(
     menus = result.scalars().all()
     
     # 构建菜单树
-    menu_tree = await get_menu_tree(menus)
+    return await get_menu_tree(menus)
+
+@router.get("/all", response_model=ResponseBase[List[Dict[str, Any]]])
+async def get_all_menus(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取所有菜单（树形结构）"""
+    async def load():
+        return await load_menu_tree(db)
     
-    return success_response(data=menu_tree)
+    # 并发的相同请求合并为一次查询
+    return await singleflight.response("menu.all", bus.version("sys_menu"), load)
+
+# 菜单列表列式格式的列，与字典格式的键一致
+MENU_COLUMNS = {
+    "id": Menu.id,
+    "name": Menu.name,
+    "path": Menu.path,
+    "component": Menu.component,
+    "redirect": Menu.redirect,
+    "parent_id": Menu.parent_id,
+    "type": Menu.type,
+    "permission": Menu.permission,
+    "icon": Menu.icon,
+    "sort": Menu.sort,
+    "status": Menu.status,
+    "isVisible": Menu.is_visible,
+}
 
 @router.get("/list", response_model=ResponseBase[List[Dict[str, Any]]])
 async def get_menu_list(
+    columns: bool = Depends(columnar_requested),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取菜单列表"""
-    # 查询所有启用的菜单
-    result = await db.execute(
-        select(Menu)
-        .where(Menu.status == True)
-        .order_by(Menu.sort)
-    )
-    menus = result.scalars().all()
+    """获取菜单列表，请求列式格式时返回columns和rows"""
+    if columns:
+        async def load_columns():
+            result = await db.execute(
+                select(*MENU_COLUMNS.values())
+                .where(Menu.status == True)
+                .order_by(Menu.sort)
+            )
+            return columnar(MENU_COLUMNS, result.all())
+        
+        return await singleflight.response("menu.list_columns", bus.version("sys_menu"), load_columns, encode_columnar)
     
-    # 转换为列表格式
-    menu_list = []
-    for menu in menus:
-        menu_list.append({
-            "id": menu.id,
-            "name": menu.name,
-            "path": menu.path,
-            "component": menu.component,
-            "redirect": menu.redirect,
-            "parent_id": menu.parent_id,
-            "type": menu.type,
-            "permission": menu.permission,
-            "icon": menu.icon,
-            "sort": menu.sort,
-            "status": menu.status,
-            "isVisible": menu.is_visible
-        })
+    async def load():
+        # 查询所有启用的菜单
+        result = await db.execute(
+            select(Menu)
+            .where(Menu.status == True)
+            .order_by(Menu.sort)
+        )
+        menus = result.scalars().all()
+        
+        # 转换为列表格式
+        menu_list = []
+        for menu in menus:
+            menu_list.append({
+                "id": menu.id,
+                "name": menu.name,
+                "path": menu.path,
+                "component": menu.component,
+                "redirect": menu.redirect,
+                "parent_id": menu.parent_id,
+                "type": menu.type,
+                "permission": menu.permission,
+                "icon": menu.icon,
+                "sort": menu.sort,
+                "status": menu.status,
+                "isVisible": menu.is_visible
+            })
+        return menu_list
     
-    return success_response(data=menu_list)
+    return await singleflight.response("menu.list", bus.version("sys_menu"), load)
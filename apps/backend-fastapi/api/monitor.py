@@ -0,0 +1,148 @@
+import re
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any
+
+from api.auth import get_current_superuser
+from core.cache_bus import bus
+from core.audit import audit
+from core.blocking import blocking_detector
+from core.profiler import route_profiler, to_collapsed, ProfilerBusy
+from core.memprofile import memory_profiler
+from core.singleflight import singleflight
+from core.query_cache import query_cache
+from core.events import change_broadcaster
+from core.jobs import job_manager
+from core.admission import admission
+from core.user_index import user_index
+from models.user import User
+from schemas.base import ResponseBase
+from utils.response import success_response, error_response
+
+router = APIRouter()
+
+@router.get("/cache-bus", response_model=ResponseBase[Dict[str, Any]])
+async def get_cache_bus_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取缓存失效总线状态及跨worker传播延迟"""
+    return success_response(data=bus.stats())
+
+@router.get("/singleflight", response_model=ResponseBase[Dict[str, Any]])
+async def get_singleflight_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取请求合并统计"""
+    return success_response(data=singleflight.stats())
+
+@router.get("/query-cache", response_model=ResponseBase[Dict[str, Any]])
+async def get_query_cache_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取查询缓存命中统计"""
+    return success_response(data=query_cache.stats())
+
+@router.get("/events", response_model=ResponseBase[Dict[str, Any]])
+async def get_events_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取变更推送连接数和当前序号"""
+    return success_response(data=change_broadcaster.stats())
+
+@router.get("/admission", response_model=ResponseBase[Dict[str, Any]])
+async def get_admission_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取准入控制的并发限制和拒绝次数"""
+    return success_response(data=admission.stats())
+
+@router.get("/user-index", response_model=ResponseBase[Dict[str, Any]])
+async def get_user_index_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取用户前缀索引的键数、增量和内存占用"""
+    return success_response(data=user_index.stats())
+
+@router.get("/jobs", response_model=ResponseBase[Dict[str, Any]])
+async def get_job_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取本进程后台任务的执行情况"""
+    return success_response(data=job_manager.stats())
+
+@router.get("/audit", response_model=ResponseBase[Dict[str, Any]])
+async def get_audit_stats(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取审计日志写入统计"""
+    return success_response(data=audit.stats())
+
+@router.get("/blocking", response_model=ResponseBase[Dict[str, Any]])
+async def get_blocking_report(
+    current_user: User = Depends(get_current_superuser)
+):
+    """获取事件循环阻塞报告（按路由和阻塞代码位置聚合）"""
+    return success_response(data={
+        "enabled": blocking_detector.running,
+        "threshold_ms": blocking_detector.threshold * 1000,
+        "stalls": blocking_detector.stalls,
+        "items": blocking_detector.report()
+    })
+
+@router.delete("/blocking", response_model=ResponseBase)
+async def reset_blocking_report(
+    current_user: User = Depends(get_current_superuser)
+):
+    """清空事件循环阻塞报告"""
+    blocking_detector.reset()
+    return success_response()
+
+@router.get("/profile")
+async def profile_route(
+    route: str = Query(..., description="路由匹配正则，匹配\"方法 路径模板\"，如\"GET /system/user/list\""),
+    hz: int = Query(default=100, ge=1, description="采样频率（次/秒）"),
+    duration: float = Query(default=10, gt=0, description="采样时长（秒）"),
+    format: str = Query(default="collapsed", description="输出格式：collapsed折叠栈文本，json统计信息"),
+    current_user: User = Depends(get_current_superuser)
+):
+    """对匹配的路由进行CPU采样分析，完成后返回折叠栈（可导入火焰图工具）"""
+    try:
+        result = await route_profiler.profile(route, hz, duration)
+    except ProfilerBusy:
+        return error_response(code=409, message="已有采样分析正在进行")
+    except re.error as e:
+        return error_response(code=400, message=f"路由匹配正则无效：{e}")
+    
+    if format == "json":
+        return success_response(data={
+            "route": result["route"],
+            "hz": result["hz"],
+            "duration": result["duration"],
+            "samples": result["samples"],
+            "matched": result["matched"],
+            "dropped": result["dropped"],
+            "top": [{"stack": stack, "count": count} for stack, count in result["stacks"].most_common(20)]
+        })
+    
+    return PlainTextResponse(
+        to_collapsed(result),
+        headers={"X-Profile-Samples": str(result["matched"])}
+    )
+
+@router.get("/memory", response_model=ResponseBase[Dict[str, Any]])
+async def profile_memory(
+    route: str = Query(default=".*", description="路由匹配正则，匹配\"方法 路径模板\""),
+    duration: float = Query(default=10, gt=0, description="采样时长（秒）"),
+    frames: int = Query(default=10, ge=1, le=25, description="每次分配记录的调用栈深度"),
+    top: int = Query(default=20, ge=1, le=100, description="返回的分配位置数量"),
+    current_user: User = Depends(get_current_superuser)
+):
+    """开启tracemalloc对匹配的路由进行内存分析，返回各路由的峰值、净留存以及主要分配位置"""
+    try:
+        result = await memory_profiler.profile(route, duration, frames, top)
+    except ProfilerBusy:
+        return error_response(code=409, message="已有内存分析正在进行")
+    except re.error as e:
+        return error_response(code=400, message=f"路由匹配正则无效：{e}")
+    
+    return success_response(data=result)
@@ -1,21 +1,62 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func, literal, case, update, insert, delete, or_, not_, union_all
 from sqlalchemy.orm import selectinload
 from typing import List, Dict, Any, Optional
+from datetime import datetime
 
-from core.database import get_db
-from api.auth import get_current_user
+from core.config import settings
+from core.database import get_db, use_pool, BulkSessionLocal
+from core.security import get_password_hash
+from core.cache_bus import bus
+from core.singleflight import singleflight
+from core.query_cache import query_cache
+from core.query_guard import guard_queries
+from core.user_index import user_index
+from core.audit import audit
+from core.token_version import bump_token_version
+from core.system_stats import system_stats
+from core.archive import user_archiver, restore_users, split_ids
+from core.jobs import job_manager, JobContext, JobQueueFull, chunked
+from core.change_log import next_change_version, mark_changed, mark_deleted, load_changes
+from api.auth import get_current_user, get_current_superuser
 from models.user import User
 from models.role import Role
 from models.dept import Dept
 from models.menu import Menu
+from models.user_role import UserRole
+from models.audit_log import AuditLog
+from models.user_archive import UserArchive
 from schemas.base import ResponseBase
 from utils.response import success_response, error_response
+from utils.columnar import columnar_requested, columnar, encode_columnar
 
 router = APIRouter()
 
+def format_time(value: Optional[datetime]) -> Optional[str]:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else None
+
+def sync_params(
+    since: int = Query(default=0, ge=0, description="上次同步返回的version，0表示全量同步"),
+    after: Optional[int] = Query(default=None, description="上次同步返回的after，仅hasMore为true时传入"),
+    limit: int = Query(default=500, ge=1, le=5000, description="每次返回的最大行数")
+) -> Dict[str, Any]:
+    """增量同步接口的公共参数"""
+    return {"since": since, "after": after, "limit": limit}
+
+def role_to_dict(role: Role) -> Dict[str, Any]:
+    return {
+        "id": role.id,
+        "name": role.name,
+        "code": role.code,
+        "status": role.status,
+        "remark": role.remark,
+        "created_at": role.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "updated_at": format_time(role.updated_at)
+    }
+
 # 角色相关路由
 @router.get("/role/list", response_model=ResponseBase[List[Dict[str, Any]]])
 async def get_role_list(
@@ -23,22 +64,36 @@ async def get_role_list(
     db: AsyncSession = Depends(get_db)
 ):
     """获取角色列表"""
-    result = await db.execute(select(Role).order_by(Role.id))
-    roles = result.scalars().all()
-    
-    role_list = []
-    for role in roles:
-        role_list.append({
-            "id": role.id,
-            "name": role.name,
-            "code": role.code,
-            "status": role.status,
-            "remark": role.remark,
-            "created_at": role.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": role.updated_at.strftime("%Y-%m-%d %H:%M:%S") if role.updated_at else None
-        })
+    async def load():
+        result = await db.execute(select(Role).order_by(Role.id))
+        roles = result.scalars().all()
+        return [role_to_dict(role) for role in roles]
     
-    return success_response(data=role_list)
+    return await singleflight.response("system.role_list", bus.version("sys_role"), load)
+
+@router.get("/role/changes", response_model=ResponseBase[Dict[str, Any]])
+async def get_role_changes(
+    params: Dict[str, Any] = Depends(sync_params),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取上次同步之后变更和删除的角色"""
+    changes = await load_changes(db, Role, **params)
+    return success_response(data=changes.to_dict(role_to_dict))
+
+def dept_to_dict(dept: Dept) -> Dict[str, Any]:
+    return {
+        "id": dept.id,
+        "name": dept.name,
+        "parent_id": dept.parent_id,
+        "leader": dept.leader,
+        "phone": dept.phone,
+        "email": dept.email,
+        "sort": dept.sort,
+        "status": dept.status,
+        "created_at": dept.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "updated_at": format_time(dept.updated_at)
+    }
 
 # 部门相关路由
 @router.get("/dept/list", response_model=ResponseBase[List[Dict[str, Any]]])
@@ -47,28 +102,25 @@ async def get_dept_list(
     db: AsyncSession = Depends(get_db)
 ):
     """获取部门列表"""
-    result = await db.execute(select(Dept).order_by(Dept.sort))
-    depts = result.scalars().all()
-    
-    dept_list = []
-    for dept in depts:
-        dept_list.append({
-            "id": dept.id,
-            "name": dept.name,
-            "parent_id": dept.parent_id,
-            "leader": dept.leader,
-            "phone": dept.phone,
-            "email": dept.email,
-            "sort": dept.sort,
-            "status": dept.status,
-            "created_at": dept.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": dept.updated_at.strftime("%Y-%m-%d %H:%M:%S") if dept.updated_at else None
-        })
+    async def load():
+        result = await db.execute(select(Dept).order_by(Dept.sort))
+        depts = result.scalars().all()
+        return [dept_to_dict(dept) for dept in depts]
     
-    return success_response(data=dept_list)
+    return await singleflight.response("system.dept_list", bus.version("sys_dept"), load)
+
+@router.get("/dept/changes", response_model=ResponseBase[Dict[str, Any]])
+async def get_dept_changes(
+    params: Dict[str, Any] = Depends(sync_params),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取上次同步之后变更和删除的部门"""
+    changes = await load_changes(db, Dept, **params)
+    return success_response(data=changes.to_dict(dept_to_dict))
 
 # 用户相关路由
-@router.get("/user/list", response_model=ResponseBase[Dict[str, Any]])
+@router.get("/user/list", response_model=ResponseBase[Dict[str, Any]], dependencies=[Depends(guard_queries)])
 async def get_user_list(
     page: int = Query(default=1, ge=1, description="页码"),
     pageSize: int = Query(default=20, ge=1, le=100, description="每页条数"),
@@ -80,61 +132,238 @@ async def get_user_list(
     status: Optional[bool] = Query(default=None, description="状态"),
     role_id: Optional[int] = Query(default=None, description="角色ID"),
     dept_id: Optional[int] = Query(default=None, description="部门ID"),
+    archived: bool = Query(default=False, description="查询归档用户"),
+    columns: bool = Depends(columnar_requested),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取用户列表"""
-    # 构建查询，使用selectinload预加载角色信息
-    query = select(User).options(selectinload(User.roles))
+    """获取用户列表，请求列式格式时返回columns和rows（归档用户除外）"""
+    if archived:
+        data = await load_archived_users(db, page, pageSize, username, nickname, name, email, phone, role_id, dept_id)
+        return success_response(data=data)
     
-    # 条件过滤
+    filters = user_list_filters(username, nickname, name, email, phone, status, role_id, dept_id)
+    
+    async def count() -> int:
+        # 只按用户表过滤，不需要子查询和预加载
+        count_result = await db.execute(select(func.count(User.id)).where(*user_conditions(filters)))
+        return count_result.scalar()
+    
+    async def page_total() -> int:
+        # 统计总条数：翻页时复用同一过滤条件的总数
+        total = estimated_user_total(filters)
+        if total is None:
+            total = await query_cache.get_or_load("system.user_count", filters, bus.version("sys_user"), count)
+        return total
+    
+    # 页面内容包含部门和角色名称，依赖的表任一变更即失效
+    versions = (bus.version("sys_user"), bus.version("sys_user_role"), bus.version("sys_dept"), bus.version("sys_role"))
+    
+    if columns:
+        async def load_columns():
+            total = await page_total()
+            data = await load_user_columns(db, filters, (page - 1) * pageSize, pageSize)
+            data.update(total=total, page=page, pageSize=pageSize)
+            return data
+        
+        return await query_cache.response("system.user_list_columns", (filters, page, pageSize), versions, load_columns, encode_columnar)
+    
+    async def load():
+        total = await page_total()
+        
+        # 分页查询，使用selectinload预加载角色信息
+        offset = (page - 1) * pageSize
+        query = (
+            select(User)
+            .options(selectinload(User.roles))
+            .where(*user_conditions(filters))
+            .offset(offset).limit(pageSize).order_by(User.id.desc())
+        )
+        
+        result = await db.execute(query)
+        users = result.scalars().all()
+        
+        # 格式化用户数据
+        user_list = []
+        for user in users:
+            # 获取部门信息
+            dept_name = None
+            if user.dept_id:
+                dept_result = await db.execute(select(Dept).where(Dept.id == user.dept_id))
+                dept = dept_result.scalars().first()
+                if dept:
+                    dept_name = dept.name
+            
+            # 获取角色信息（已通过预加载获取）
+            roles = []
+            for role in user.roles:
+                roles.append({
+                    "id": role.id,
+                    "name": role.name,
+                    "code": role.code
+                })
+            
+            user_list.append({
+                "id": user.id,
+                "username": user.username,
+                "nickname": user.nickname,
+                "name": user.name,
+                "email": user.email,
+                "phone": user.phone,
+                "avatar": user.avatar,
+                "dept_id": user.dept_id,
+                "deptName": dept_name,
+                "roles": roles,
+                "status": user.status,
+                "is_superuser": user.is_superuser,
+                "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "updated_at": user.updated_at.strftime("%Y-%m-%d %H:%M:%S") if user.updated_at else None
+            })
+        
+        # 构建分页响应
+        response_data = {
+            "items": user_list,
+            "total": total,
+            "page": page,
+            "pageSize": pageSize
+        }
+        return response_data
+    
+    return await query_cache.response("system.user_list", (filters, page, pageSize), versions, load)
+
+# 用户列表列式格式的列（roles除外），与字典格式的键一致
+USER_COLUMNS = {
+    "id": User.id,
+    "username": User.username,
+    "nickname": User.nickname,
+    "name": User.name,
+    "email": User.email,
+    "phone": User.phone,
+    "avatar": User.avatar,
+    "dept_id": User.dept_id,
+    "deptName": Dept.name,
+    "status": User.status,
+    "is_superuser": User.is_superuser,
+    "created_at": User.created_at,
+    "updated_at": User.updated_at,
+}
+
+async def load_user_columns(db: AsyncSession, filters: tuple, offset: int, limit: int) -> Dict[str, Any]:
+    """按列式格式加载一页用户：部门名称通过连接查询获取，角色为最后一列，每个角色为[id, name, code]"""
+    result = await db.execute(
+        select(*USER_COLUMNS.values())
+        .outerjoin(Dept, Dept.id == User.dept_id)
+        .where(*user_conditions(filters))
+        .order_by(User.id.desc())
+        .offset(offset).limit(limit)
+    )
+    rows = result.all()
+    
+    user_roles: Dict[int, List[tuple]] = {}
+    if rows:
+        role_result = await db.execute(
+            select(UserRole.user_id, Role.id, Role.name, Role.code)
+            .join(Role, Role.id == UserRole.role_id)
+            .where(UserRole.user_id.in_([row[0] for row in rows]))
+            .order_by(Role.id)
+        )
+        for user_id, *role in role_result.all():
+            user_roles.setdefault(user_id, []).append(role)
+    
+    data = columnar([*USER_COLUMNS, "roles"], ((*row, user_roles.get(row[0], [])) for row in rows))
+    data["nested"] = {"roles": ["id", "name", "code"]}
+    return data
+
+def user_list_filters(
+    username: Optional[str],
+    nickname: Optional[str],
+    name: Optional[str],
+    email: Optional[str],
+    phone: Optional[str],
+    status: Optional[bool],
+    role_id: Optional[int],
+    dept_id: Optional[int]
+) -> tuple:
+    """规范化的过滤条件，用作缓存键：空字符串和0与未设置等价"""
+    return (username or None, nickname or None, name or None, email or None, phone or None, status, role_id or None, dept_id or None)
+
+def user_conditions(filters: tuple) -> list:
+    """用户列表的过滤条件"""
+    username, nickname, name, email, phone, status, role_id, dept_id = filters
+    conditions = []
     if username:
-        query = query.where(User.username.like(f"%{username}%"))
+        conditions.append(User.username.like(f"%{username}%"))
     if nickname:
-        query = query.where(User.nickname.like(f"%{nickname}%"))
+        conditions.append(User.nickname.like(f"%{nickname}%"))
     if name:
-        query = query.where(User.name.like(f"%{name}%"))
+        conditions.append(User.name.like(f"%{name}%"))
     if email:
-        query = query.where(User.email.like(f"%{email}%"))
+        conditions.append(User.email.like(f"%{email}%"))
     if phone:
-        query = query.where(User.phone.like(f"%{phone}%"))
+        conditions.append(User.phone.like(f"%{phone}%"))
     if status is not None:
-        query = query.where(User.status == status)
+        conditions.append(User.status == status)
+    if dept_id:
+        conditions.append(User.dept_id == dept_id)
+    return conditions
+
+def estimated_user_total(filters: tuple) -> Optional[int]:
+    """未过滤、只按状态或只按部门过滤时，由系统统计计数器得出总数；未启用或计数器待重算时返回None"""
+    if not settings.user_list_estimate_total or system_stats.stale:
+        return None
+    username, nickname, name, email, phone, status, role_id, dept_id = filters
+    if username or nickname or name or email or phone or (status is not None and dept_id):
+        return None
+    if status is not None:
+        return system_stats.users_active if status else system_stats.users_total - system_stats.users_active
+    if dept_id:
+        return system_stats.users_by_dept.get(dept_id, 0)
+    return system_stats.users_total
+
+async def load_archived_users(
+    db: AsyncSession,
+    page: int,
+    pageSize: int,
+    username: Optional[str],
+    nickname: Optional[str],
+    name: Optional[str],
+    email: Optional[str],
+    phone: Optional[str],
+    role_id: Optional[int],
+    dept_id: Optional[int]
+) -> Dict[str, Any]:
+    """查询归档用户，过滤条件与在线用户列表一致"""
+    query = select(UserArchive)
+    if username:
+        query = query.where(UserArchive.username.like(f"%{username}%"))
+    if nickname:
+        query = query.where(UserArchive.nickname.like(f"%{nickname}%"))
+    if name:
+        query = query.where(UserArchive.name.like(f"%{name}%"))
+    if email:
+        query = query.where(UserArchive.email.like(f"%{email}%"))
+    if phone:
+        query = query.where(UserArchive.phone.like(f"%{phone}%"))
+    if role_id:
+        query = query.where((literal(",") + UserArchive.role_ids + ",").like(f"%,{role_id},%"))
     if dept_id:
-        query = query.where(User.dept_id == dept_id)
+        query = query.where(UserArchive.dept_id == dept_id)
     
-    # 统计总条数
-    count_query = select(func.count(User.id)).select_from(query.subquery())
-    count_result = await db.execute(count_query)
+    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
     total = count_result.scalar()
     
-    # 分页查询
     offset = (page - 1) * pageSize
-    query = query.offset(offset).limit(pageSize).order_by(User.id.desc())
-    
-    result = await db.execute(query)
+    result = await db.execute(query.order_by(UserArchive.archived_at.desc(), UserArchive.id.desc()).offset(offset).limit(pageSize))
     users = result.scalars().all()
     
-    # 格式化用户数据
+    # 部门和角色均为小表，一次加载名称
+    dept_result = await db.execute(select(Dept.id, Dept.name))
+    dept_names = {row.id: row.name for row in dept_result.all()}
+    role_result = await db.execute(select(Role.id, Role.name, Role.code))
+    roles = {row.id: row for row in role_result.all()}
+    
     user_list = []
     for user in users:
-        # 获取部门信息
-        dept_name = None
-        if user.dept_id:
-            dept_result = await db.execute(select(Dept).where(Dept.id == user.dept_id))
-            dept = dept_result.scalars().first()
-            if dept:
-                dept_name = dept.name
-        
-        # 获取角色信息（已通过预加载获取）
-        roles = []
-        for role in user.roles:
-            roles.append({
-                "id": role.id,
-                "name": role.name,
-                "code": role.code
-            })
-        
         user_list.append({
             "id": user.id,
             "username": user.username,
@@ -144,23 +373,126 @@ async def get_user_list(
             "phone": user.phone,
             "avatar": user.avatar,
             "dept_id": user.dept_id,
-            "deptName": dept_name,
-            "roles": roles,
-            "status": user.status,
+            "deptName": dept_names.get(user.dept_id),
+            "roles": [
+                {"id": roles[rid].id, "name": roles[rid].name, "code": roles[rid].code}
+                for rid in split_ids(user.role_ids) if rid in roles
+            ],
+            "status": False,
             "is_superuser": user.is_superuser,
-            "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": user.updated_at.strftime("%Y-%m-%d %H:%M:%S") if user.updated_at else None
+            "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else None,
+            "disabled_at": user.disabled_at.strftime("%Y-%m-%d %H:%M:%S") if user.disabled_at else None,
+            "archived_at": user.archived_at.strftime("%Y-%m-%d %H:%M:%S")
         })
     
-    # 构建分页响应
-    response_data = {
+    return {
         "items": user_list,
         "total": total,
         "page": page,
         "pageSize": pageSize
     }
+
+@router.get("/user/changes", response_model=ResponseBase[Dict[str, Any]], dependencies=[Depends(guard_queries)])
+async def get_user_changes(
+    params: Dict[str, Any] = Depends(sync_params),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取上次同步之后变更和删除的用户
+
+    角色和部门只返回ID，名称由客户端从角色、部门的增量同步结果中关联，角色或部门改名不会使用户重新下发
+    """
+    changes = await load_changes(db, User, **params)
+    ids = [user.id for user in changes.rows]
+    user_roles: Dict[int, List[int]] = {}
+    if ids:
+        role_result = await db.execute(select(UserRole.user_id, UserRole.role_id).where(UserRole.user_id.in_(ids)))
+        for user_id, role_id in role_result.all():
+            user_roles.setdefault(user_id, []).append(role_id)
     
-    return success_response(data=response_data)
+    def format_user(user: User) -> Dict[str, Any]:
+        return {
+            "id": user.id,
+            "username": user.username,
+            "nickname": user.nickname,
+            "name": user.name,
+            "email": user.email,
+            "phone": user.phone,
+            "avatar": user.avatar,
+            "dept_id": user.dept_id,
+            "role_ids": sorted(user_roles.get(user.id, [])),
+            "status": user.status,
+            "is_superuser": user.is_superuser,
+            "created_at": format_time(user.created_at),
+            "updated_at": format_time(user.updated_at)
+        }
+    
+    return success_response(data=changes.to_dict(format_user))
+
+# 用户输入联想
+async def search_user_prefix(db: AsyncSession, q: str, limit: int, status: Optional[bool]) -> List[int]:
+    """前缀索引未就绪时的数据库前缀查询，与索引一致：按匹配到的字段值（小写）排序，同一用户只出现一次
+
+    每个字段单独查询再合并，各分支可以使用字段上的索引；输入中的通配符按字面匹配
+    """
+    escaped = q.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    branches = []
+    for column in (User.username, User.nickname, User.name):
+        branch = select(func.lower(column).label("key"), User.id.label("id")).where(column.like(f"{escaped}%", escape="\\"))
+        if status is not None:
+            branch = branch.where(User.status == status)
+        branches.append(branch)
+    matches = union_all(*branches).subquery()
+    # 一个用户最多匹配每个字段各一次，多取的行去重后仍能凑满limit个用户
+    result = await db.execute(
+        select(matches.c.id).order_by(matches.c.key, matches.c.id).limit(limit * len(branches))
+    )
+    return list(dict.fromkeys(result.scalars().all()))[:limit]
+
+@router.get("/user/suggest", response_model=ResponseBase[List[Dict[str, Any]]])
+async def suggest_users(
+    q: str = Query(..., min_length=1, max_length=64, description="用户名、昵称或姓名的前缀"),
+    limit: int = Query(default=10, ge=1, le=50, description="返回条数"),
+    status: Optional[bool] = Query(default=None, description="状态"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """按前缀匹配用户名、昵称或姓名（不区分大小写），供选择用户的输入框联想使用
+
+    前缀索引就绪时从内存索引查找用户ID，再按主键读取展示字段；索引构建完成前回退到数据库前缀查询
+    """
+    # 按状态过滤时多取一些候选，过滤后仍能凑满limit条
+    candidates = limit * 3 if status is not None else limit
+    if user_index.ready:
+        ids = user_index.search(q, candidates)
+        if not ids:
+            return success_response(data=[])
+        query = select(User).where(User.id.in_(ids))
+    else:
+        ids = await search_user_prefix(db, q, candidates, status)
+        if not ids:
+            return success_response(data=[])
+        query = select(User).where(User.id.in_(ids))
+    if status is not None:
+        query = query.where(User.status == status)
+    
+    result = await db.execute(query)
+    # 保持前缀匹配给出的顺序
+    position = {user_id: i for i, user_id in enumerate(ids)}
+    users = sorted(result.scalars().all(), key=lambda user: position[user.id])
+    
+    return success_response(data=[
+        {
+            "id": user.id,
+            "username": user.username,
+            "nickname": user.nickname,
+            "name": user.name,
+            "avatar": user.avatar,
+            "dept_id": user.dept_id,
+            "status": user.status,
+        }
+        for user in users[:limit]
+    ])
 
 # 创建用户
 @router.post("/user", response_model=ResponseBase)
@@ -185,20 +517,89 @@ async def create_user(
         avatar=data.get("avatar"),
         dept_id=data.get("dept_id"),
         status=data.get("status", True),
-        password="$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"  # 默认密码：123456
+        disabled_at=None if data.get("status", True) else datetime.now(),
+        password=await run_in_threadpool(get_password_hash, data.get("password") or "123456")  # 默认密码：123456
     )
     
     # 添加角色关联
+    role_ids = []
     if "role_ids" in data and data["role_ids"]:
         role_result = await db.execute(select(Role).where(Role.id.in_(data["role_ids"])))
-        new_user.roles.extend(role_result.scalars().all())
+        roles = role_result.scalars().all()
+        role_ids = [role.id for role in roles]
+        new_user.roles.extend(roles)
     
+    new_user.change_version = await next_change_version(db, "sys_user")
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
+    system_stats.user_created(new_user.status, new_user.dept_id, role_ids)
+    user_index.upsert(new_user.id, (new_user.username, new_user.nickname, new_user.name))
+    await bus.publish("sys_user", keys=[new_user.id])
+    if data.get("role_ids"):
+        await bus.publish("sys_user_role", keys=[new_user.id])
+    audit.record(current_user, "user.create", "user", [new_user.id], data)
     
     return success_response(message="用户创建成功")
 
+async def submit_job(kind: str, params: Dict[str, Any], current_user: User, message: str):
+    """提交后台任务，返回任务ID供前端轮询"""
+    try:
+        job_id = await job_manager.submit(kind, params, current_user)
+    except JobQueueFull:
+        return error_response(code=503, message="后台任务繁忙，请稍后再试")
+    return success_response(data={"jobId": job_id}, message=message)
+
+async def set_users_status(db: AsyncSession, ids: List[int], status: bool) -> int:
+    """更新一批用户的状态并提交，只更新状态实际变化的用户，返回变化的用户数"""
+    version = await next_change_version(db, "sys_user")
+    result = await db.execute(
+        User.__table__.update()
+        .where(User.id.in_(ids), User.status != status)
+        .values(status=status, disabled_at=None if status else datetime.now(), change_version=version)
+    )
+    changed = result.rowcount
+    if not status:
+        # 禁用后使已签发的令牌失效
+        await bump_token_version(db, ids)
+    await db.commit()
+    system_stats.users_status_changed(changed, status)
+    await bus.publish("sys_user", keys=ids)
+    return changed
+
+@job_manager.handler("user.status")
+async def user_status_job(context: JobContext, params: Dict[str, Any]):
+    """批量修改用户状态，每批一个事务"""
+    ids = params["ids"]
+    await context.set_total(len(ids))
+    changed = 0
+    for chunk in chunked(ids, settings.job_chunk_size):
+        async with BulkSessionLocal() as db:
+            changed += await set_users_status(db, list(chunk), params["status"])
+        await context.advance(len(chunk))
+    return {"changed": changed}
+
+# 更新用户状态
+@router.put("/user/status", response_model=ResponseBase)
+async def update_user_status(
+    request_data: dict,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """更新用户状态，数量超过job_inline_limit时转为后台任务"""
+    ids = request_data.get("ids")
+    status = request_data.get("status", False)
+    
+    if not ids:
+        return error_response(code=400, message="请选择要更新的用户")
+    
+    audit.record(current_user, "user.status", "user", ids, {"status": status})
+    if len(ids) > settings.job_inline_limit:
+        return await submit_job("user.status", {"ids": ids, "status": status}, current_user, "已提交后台任务")
+    
+    await set_users_status(db, ids, status)
+    return success_response(message="用户状态更新成功")
+
 # 更新用户
 @router.put("/user/{id}", response_model=ResponseBase)
 async def update_user(
@@ -215,6 +616,13 @@ async def update_user(
     if not user:
         return error_response(code=404, message="用户不存在")
     
+    # 禁用、修改密码或角色后使该用户已签发的令牌失效
+    revoke_tokens = (
+        ("status" in data and data["status"] != user.status)
+        or bool(data.get("password"))
+    )
+    old_status, old_dept_id = user.status, user.dept_id
+    
     # 更新用户基本信息
     if "nickname" in data:
         user.nickname = data["nickname"]
@@ -229,25 +637,154 @@ async def update_user(
     if "dept_id" in data:
         user.dept_id = data["dept_id"]
     if "status" in data:
+        if data["status"] != user.status:
+            user.disabled_at = None if data["status"] else datetime.now()
         user.status = data["status"]
-    if "password" in data:
-        user.password = "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"  # 密码：123456
+    if data.get("password"):
+        user.password = await run_in_threadpool(get_password_hash, data["password"])
+    
+    # 先分配版本号再写入，与其他写入方的加锁顺序一致（用户行的修改在提交时写入）
+    user.change_version = await next_change_version(db, "sys_user")
     
-    # 更新角色关联
+    # 更新角色关联：与现有关联比较，只写入新增和移除的部分
+    roles_changed = False
+    added_ids = removed_ids = set()
     if "role_ids" in data:
-        # 清除现有角色
-        user.roles.clear()
+        current_result = await db.execute(select(UserRole.role_id).where(UserRole.user_id == user.id))
+        current_ids = set(current_result.scalars().all())
+        wanted_ids = set(data["role_ids"] or [])
         
-        # 添加新角色
-        if data["role_ids"]:
-            role_result = await db.execute(select(Role).where(Role.id.in_(data["role_ids"])))
-            user.roles.extend(role_result.scalars().all())
+        removed_ids = current_ids - wanted_ids
+        added_ids = wanted_ids - current_ids
+        if added_ids:
+            # 忽略不存在的角色
+            role_result = await db.execute(select(Role.id).where(Role.id.in_(added_ids)))
+            added_ids = set(role_result.scalars().all())
+        
+        if removed_ids:
+            await db.execute(
+                delete(UserRole).where(UserRole.user_id == user.id, UserRole.role_id.in_(removed_ids))
+            )
+        if added_ids:
+            await db.execute(
+                insert(UserRole),
+                [{"user_id": user.id, "role_id": role_id} for role_id in added_ids]
+            )
+        roles_changed = bool(added_ids or removed_ids)
+        revoke_tokens = revoke_tokens or roles_changed
+    
+    if revoke_tokens:
+        await bump_token_version(db, [user.id])
     
     await db.commit()
     await db.refresh(user)
+    system_stats.user_updated(old_status, user.status, old_dept_id, user.dept_id)
+    if roles_changed:
+        system_stats.roles_changed(added=added_ids, removed=removed_ids)
+    user_index.upsert(user.id, (user.username, user.nickname, user.name))
+    await bus.publish("sys_user", keys=[user.id])
+    if roles_changed:
+        await bus.publish("sys_user_role", keys=[user.id])
+    audit.record(current_user, "user.update", "user", [user.id], data)
     
     return success_response(message="用户更新成功")
 
+# 批量授予或撤销角色
+@router.post("/user/roles", response_model=ResponseBase[Dict[str, Any]])
+async def assign_user_roles(
+    request_data: dict,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量为用户授予或撤销角色：先查出关联会变化的用户，再用一条SQL语句写入"""
+    user_ids = request_data.get("user_ids")
+    role_ids = request_data.get("role_ids")
+    action = request_data.get("action", "grant")
+    
+    if not user_ids or not role_ids:
+        return error_response(code=400, message="请选择用户和角色")
+    if action not in ("grant", "revoke"):
+        return error_response(code=400, message="操作类型只能是grant或revoke")
+    
+    if action == "grant":
+        # 用户与角色组合中尚不存在的关联
+        exists_clause = (
+            select(UserRole.id)
+            .where(UserRole.user_id == User.id, UserRole.role_id == Role.id)
+            .exists()
+        )
+        pairs = (
+            select(User.id, Role.id)
+            .join(Role, Role.id.in_(role_ids))
+            .where(User.id.in_(user_ids), ~exists_clause)
+        )
+        changed_result = await db.execute(pairs.with_only_columns(User.id).distinct())
+        changed_ids = changed_result.scalars().all()
+    else:
+        changed_result = await db.execute(
+            select(UserRole.user_id)
+            .where(UserRole.user_id.in_(user_ids), UserRole.role_id.in_(role_ids))
+            .distinct()
+        )
+        changed_ids = changed_result.scalars().all()
+    
+    # 只有关联确实变化的用户需要使令牌失效并重新下发增量；先分配版本号再写入关联
+    affected = 0
+    if changed_ids:
+        await mark_changed(db, User, changed_ids)
+        if action == "grant":
+            # INSERT ... SELECT：尚不存在的关联一次性插入；写入方已在序列行上排队，(user_id, role_id)唯一约束兜底
+            result = await db.execute(insert(UserRole).from_select(["user_id", "role_id"], pairs))
+        else:
+            result = await db.execute(
+                delete(UserRole).where(UserRole.user_id.in_(changed_ids), UserRole.role_id.in_(role_ids))
+            )
+        affected = result.rowcount
+        await bump_token_version(db, changed_ids)
+    await db.commit()
+    
+    if affected:
+        # 批量语句无法得知各角色的增量，由后台重算
+        system_stats.mark_dirty()
+        await bus.publish("sys_user", keys=changed_ids)
+        await bus.publish("sys_user_role", keys=changed_ids)
+    audit.record(current_user, f"user.role_{action}", "user", user_ids, {"role_ids": role_ids})
+    
+    return success_response(data={"affected": affected}, message="角色分配成功")
+
+async def delete_users(db: AsyncSession, ids: List[int]) -> int:
+    """删除一批用户及其角色关联并提交，返回删除的用户数"""
+    # 记录被删除用户的状态、部门和角色，用于更新统计
+    user_result = await db.execute(select(User.id, User.status, User.dept_id).where(User.id.in_(ids)))
+    deleted_users = user_result.all()
+    deleted_rows = [(row.status, row.dept_id) for row in deleted_users]
+    role_result = await db.execute(select(UserRole.role_id).where(UserRole.user_id.in_(ids)))
+    deleted_role_ids = role_result.scalars().all()
+    
+    # 留下删除记录供增量同步，再删除用户及其角色关联
+    await mark_deleted(db, "sys_user", [row.id for row in deleted_users])
+    await db.execute(delete(UserRole).where(UserRole.user_id.in_(ids)))
+    await db.execute(User.__table__.delete().where(User.id.in_(ids)))
+    await db.commit()
+    system_stats.users_deleted(deleted_rows, deleted_role_ids)
+    user_index.remove(ids)
+    await bus.publish("sys_user", keys=ids)
+    if deleted_role_ids:
+        await bus.publish("sys_user_role", keys=ids)
+    return len(deleted_rows)
+
+@job_manager.handler("user.delete")
+async def user_delete_job(context: JobContext, params: Dict[str, Any]):
+    """批量删除用户，每批一个事务，取消后已删除的批次不回滚"""
+    ids = params["ids"]
+    await context.set_total(len(ids))
+    deleted = 0
+    for chunk in chunked(ids, settings.job_chunk_size):
+        async with BulkSessionLocal() as db:
+            deleted += await delete_users(db, list(chunk))
+        await context.advance(len(chunk))
+    return {"deleted": deleted}
+
 # 删除用户
 @router.delete("/user", response_model=ResponseBase)
 async def delete_user(
@@ -255,37 +792,68 @@ async def delete_user(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """删除用户"""
+    """删除用户，数量超过job_inline_limit时转为后台任务"""
     ids = request_data.get("ids")
     
     if not ids:
         return error_response(code=400, message="请选择要删除的用户")
     
-    # 删除用户
-    await db.execute(User.__table__.delete().where(User.id.in_(ids)))
-    await db.commit()
+    audit.record(current_user, "user.delete", "user", ids)
+    if len(ids) > settings.job_inline_limit:
+        return await submit_job("user.delete", {"ids": ids}, current_user, "已提交后台任务")
     
+    await delete_users(db, ids)
     return success_response(message="用户删除成功")
 
-# 更新用户状态
-@router.put("/user/status", response_model=ResponseBase)
-async def update_user_status(
+# 立即归档长期禁用的用户
+@router.post("/user/archive", response_model=ResponseBase[Dict[str, Any]])
+async def archive_users(
+    current_user: User = Depends(get_current_superuser)
+):
+    """立即执行一轮归档，把禁用超过archive_after_days天的用户移入归档表"""
+    archived = await user_archiver.run_once()
+    audit.record(current_user, "user.archive", "user", None, {"archived": archived})
+    return success_response(data={"archived": archived}, message="用户归档完成")
+
+# 恢复归档用户
+@router.post("/user/restore", response_model=ResponseBase[Dict[str, Any]])
+async def restore_archived_users(
     request_data: dict,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_superuser),
     db: AsyncSession = Depends(get_db)
 ):
-    """更新用户状态"""
+    """将归档用户移回用户表，默认保持禁用状态；status为true时同时启用"""
     ids = request_data.get("ids")
-    status = request_data.get("status", False)
+    status = bool(request_data.get("status", False))
     
     if not ids:
-        return error_response(code=400, message="请选择要更新的用户")
+        return error_response(code=400, message="请选择要恢复的用户")
     
-    # 更新用户状态
-    await db.execute(User.__table__.update().where(User.id.in_(ids)).values(status=status))
+    restored, conflicts = await restore_users(db, ids, status)
     await db.commit()
     
-    return success_response(message="用户状态更新成功")
+    if restored:
+        role_result = await db.execute(
+            select(UserRole.user_id, UserRole.role_id).where(UserRole.user_id.in_(restored))
+        )
+        user_roles: Dict[int, List[int]] = {}
+        for user_id, role_id in role_result.all():
+            user_roles.setdefault(user_id, []).append(role_id)
+        user_result = await db.execute(
+            select(User.id, User.dept_id, User.username, User.nickname, User.name).where(User.id.in_(restored))
+        )
+        for user_id, user_dept_id, *names in user_result.all():
+            system_stats.user_created(status, user_dept_id, user_roles.get(user_id, []))
+            user_index.upsert(user_id, names)
+        
+        await bus.publish("sys_user", keys=restored)
+        await bus.publish("sys_user_role", keys=restored)
+        audit.record(current_user, "user.restore", "user", restored, {"status": status})
+    
+    if conflicts:
+        return error_response(code=409, message=f"用户名或用户ID已被占用，未恢复：{conflicts}")
+    
+    return success_response(data={"restored": restored}, message="用户恢复成功")
 
 # 菜单相关路由
 @router.get("/menu/list", response_model=ResponseBase[Dict[str, Any]])
@@ -295,62 +863,92 @@ async def get_menu_list(
     name: Optional[str] = Query(default=None, description="菜单名称"),
     status: Optional[bool] = Query(default=None, description="状态"),
     type: Optional[int] = Query(default=None, description="菜单类型"),
+    columns: bool = Depends(columnar_requested),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取菜单列表"""
-    # 构建查询
-    query = select(Menu)
-    
+    """获取菜单列表，请求列式格式时返回columns和rows"""
     # 条件过滤
+    conditions = []
     if name:
-        query = query.where(Menu.name.like(f"%{name}%"))
+        conditions.append(Menu.name.like(f"%{name}%"))
     if status is not None:
-        query = query.where(Menu.status == status)
+        conditions.append(Menu.status == status)
     if type is not None:
-        query = query.where(Menu.type == type)
-    
-    # 统计总条数
-    count_query = select(func.count(Menu.id)).select_from(query.subquery())
-    count_result = await db.execute(count_query)
-    total = count_result.scalar()
+        conditions.append(Menu.type == type)
     
-    # 分页查询
-    offset = (page - 1) * pageSize
-    query = query.offset(offset).limit(pageSize).order_by(Menu.sort)
-    
-    result = await db.execute(query)
-    menus = result.scalars().all()
-    
-    # 格式化菜单数据
-    menu_list = []
-    for menu in menus:
-        menu_list.append({
-            "id": menu.id,
-            "name": menu.name,
-            "path": menu.path,
-            "component": menu.component,
-            "redirect": menu.redirect,
-            "parent_id": menu.parent_id,
-            "type": menu.type,
-            "permission": menu.permission,
-            "icon": menu.icon,
-            "sort": menu.sort,
-            "status": menu.status,
-            "hidden": not menu.is_visible,
-            "created_at": menu.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": menu.updated_at.strftime("%Y-%m-%d %H:%M:%S") if menu.updated_at else None
-        })
+    async def load():
+        # 统计总条数
+        count_result = await db.execute(select(func.count(Menu.id)).where(*conditions))
+        total = count_result.scalar()
+        
+        # 分页查询：列式格式直接使用查询结果行，不构建ORM对象和字典
+        offset = (page - 1) * pageSize
+        if columns:
+            result = await db.execute(
+                select(*MENU_COLUMNS.values()).where(*conditions).order_by(Menu.sort).offset(offset).limit(pageSize)
+            )
+            response_data = columnar(MENU_COLUMNS, result.all())
+        else:
+            result = await db.execute(select(Menu).where(*conditions).order_by(Menu.sort).offset(offset).limit(pageSize))
+            response_data = {"items": [menu_to_dict(menu) for menu in result.scalars().all()]}
+        
+        # 构建分页响应
+        response_data.update(total=total, page=page, pageSize=pageSize)
+        return response_data
     
-    # 构建分页响应
-    response_data = {
-        "items": menu_list,
-        "total": total,
-        "page": page,
-        "pageSize": pageSize
+    return await singleflight.response(
+        "system.menu_list",
+        (bus.version("sys_menu"), page, pageSize, name, status, type, columns),
+        load,
+        encode_columnar if columns else None
+    )
+
+# 菜单列表列式格式的列，与字典格式的键一致
+MENU_COLUMNS = {
+    "id": Menu.id,
+    "name": Menu.name,
+    "path": Menu.path,
+    "component": Menu.component,
+    "redirect": Menu.redirect,
+    "parent_id": Menu.parent_id,
+    "type": Menu.type,
+    "permission": Menu.permission,
+    "icon": Menu.icon,
+    "sort": Menu.sort,
+    "status": Menu.status,
+    "hidden": not_(Menu.is_visible),
+    "created_at": Menu.created_at,
+    "updated_at": Menu.updated_at,
+}
+
+def menu_to_dict(menu: Menu) -> Dict[str, Any]:
+    return {
+        "id": menu.id,
+        "name": menu.name,
+        "path": menu.path,
+        "component": menu.component,
+        "redirect": menu.redirect,
+        "parent_id": menu.parent_id,
+        "type": menu.type,
+        "permission": menu.permission,
+        "icon": menu.icon,
+        "sort": menu.sort,
+        "status": menu.status,
+        "hidden": not menu.is_visible,
+        "created_at": menu.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "updated_at": format_time(menu.updated_at)
     }
-    
-    return success_response(data=response_data)
+
+@router.get("/menu/changes", response_model=ResponseBase[Dict[str, Any]])
+async def get_menu_changes(
+    params: Dict[str, Any] = Depends(sync_params),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取上次同步之后变更和删除的菜单"""
+    changes = await load_changes(db, Menu, **params)
+    return success_response(data=changes.to_dict(menu_to_dict))
 
 # 创建菜单
 @router.post("/menu", response_model=ResponseBase)
@@ -380,12 +978,97 @@ async def create_menu(
         is_visible=not data.get("hidden", False)
     )
     
+    new_menu.change_version = await next_change_version(db, "sys_menu")
     db.add(new_menu)
     await db.commit()
     await db.refresh(new_menu)
+    system_stats.menu_created(new_menu.type)
+    await bus.publish("sys_menu", keys=[new_menu.id])
+    audit.record(current_user, "menu.create", "menu", [new_menu.id], data)
     
     return success_response(message="菜单创建成功")
 
+def find_menu_cycle(parents: Dict[int, int], ids: List[int]) -> Optional[int]:
+    """检查给定菜单沿父级向上是否形成环，返回环上的菜单ID，无环返回None"""
+    acyclic = set()
+    for menu_id in ids:
+        path = set()
+        node = menu_id
+        while node and node not in acyclic:
+            if node in path:
+                return node
+            path.add(node)
+            node = parents.get(node, 0)
+        acyclic.update(path)
+    return None
+
+# 批量调整菜单排序和层级
+@router.put("/menu/reorder", response_model=ResponseBase)
+async def reorder_menus(
+    request_data: dict,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量调整菜单的父级和排序（拖拽排序），一条UPDATE语句在同一事务中完成"""
+    items = request_data.get("items")
+    
+    if not items:
+        return error_response(code=400, message="请选择要调整的菜单")
+    
+    # 整理变更：id -> (parent_id, sort)，未传的字段保持不变
+    changes: Dict[int, Dict[str, int]] = {}
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("id"), int):
+            return error_response(code=400, message="菜单ID无效")
+        change = {}
+        try:
+            if item.get("parentId") is not None:
+                change["parent_id"] = int(item["parentId"])
+            if item.get("sort") is not None:
+                change["sort"] = int(item["sort"])
+        except (TypeError, ValueError):
+            return error_response(code=400, message=f"菜单{item['id']}的父级ID或排序无效")
+        changes[item["id"]] = change
+    
+    # 加载父级索引，在内存中应用变更后校验
+    result = await db.execute(select(Menu.id, Menu.parent_id))
+    parents = {row.id: row.parent_id or 0 for row in result.all()}
+    
+    missing = [menu_id for menu_id in changes if menu_id not in parents]
+    if missing:
+        return error_response(code=404, message=f"菜单不存在：{missing}")
+    
+    for menu_id, change in changes.items():
+        parent_id = change.get("parent_id")
+        if parent_id is None:
+            continue
+        if parent_id and parent_id not in parents:
+            return error_response(code=400, message=f"父菜单不存在：{parent_id}")
+        parents[menu_id] = parent_id
+    
+    cycle_id = find_menu_cycle(parents, list(changes))
+    if cycle_id is not None:
+        return error_response(code=400, message=f"菜单层级存在循环：{cycle_id}")
+    
+    # 使用CASE表达式一次更新所有菜单
+    parent_map = {menu_id: c["parent_id"] for menu_id, c in changes.items() if "parent_id" in c}
+    sort_map = {menu_id: c["sort"] for menu_id, c in changes.items() if "sort" in c}
+    values = {}
+    if parent_map:
+        values["parent_id"] = case(parent_map, value=Menu.id, else_=Menu.parent_id)
+    if sort_map:
+        values["sort"] = case(sort_map, value=Menu.id, else_=Menu.sort)
+    
+    ids = list(changes)
+    if values:
+        values["change_version"] = await next_change_version(db, "sys_menu")
+        await db.execute(update(Menu).where(Menu.id.in_(ids)).values(**values))
+        await db.commit()
+        await bus.publish("sys_menu", keys=ids)
+        audit.record(current_user, "menu.reorder", "menu", ids, {"items": items})
+    
+    return success_response(message="菜单排序更新成功")
+
 # 更新菜单
 @router.put("/menu/{id}", response_model=ResponseBase)
 async def update_menu(
@@ -403,6 +1086,7 @@ async def update_menu(
         return error_response(code=404, message="菜单不存在")
     
     # 更新菜单信息
+    old_type = menu.type
     menu.name = data.get("name", menu.name)
     menu.path = data.get("path", menu.path)
     menu.component = data.get("component", menu.component)
@@ -414,9 +1098,13 @@ async def update_menu(
     menu.sort = data.get("sort", menu.sort)
     menu.status = data.get("status", menu.status)
     menu.is_visible = not data.get("hidden", not menu.is_visible)
+    menu.change_version = await next_change_version(db, "sys_menu")
     
     await db.commit()
     await db.refresh(menu)
+    system_stats.menu_type_changed(old_type, menu.type)
+    await bus.publish("sys_menu", keys=[menu.id])
+    audit.record(current_user, "menu.update", "menu", [menu.id], data)
     
     return success_response(message="菜单更新成功")
 
@@ -433,22 +1121,122 @@ async def delete_menu(
     if not ids:
         return error_response(code=400, message="请选择要删除的菜单")
     
-    # 删除菜单
+    # 记录被删除菜单的类型，用于更新统计
+    type_result = await db.execute(select(Menu.id, Menu.type).where(Menu.id.in_(ids)))
+    deleted_menus = type_result.all()
+    deleted_types = [row.type for row in deleted_menus]
+    
+    # 留下删除记录供增量同步，再删除菜单
+    await mark_deleted(db, "sys_menu", [row.id for row in deleted_menus])
     await db.execute(Menu.__table__.delete().where(Menu.id.in_(ids)))
     await db.commit()
+    system_stats.menus_deleted(deleted_types)
+    await bus.publish("sys_menu", keys=ids)
+    audit.record(current_user, "menu.delete", "menu", ids)
     
     return success_response(message="菜单删除成功")
 
+# 审计日志相关路由
+@router.get("/audit/list", response_model=ResponseBase[Dict[str, Any]], dependencies=[Depends(use_pool("bulk")), Depends(guard_queries)])
+async def get_audit_list(
+    page: int = Query(default=1, ge=1, description="页码"),
+    pageSize: int = Query(default=20, ge=1, le=100, description="每页条数"),
+    user_id: Optional[int] = Query(default=None, description="操作人ID"),
+    action: Optional[str] = Query(default=None, description="操作类型"),
+    target_id: Optional[int] = Query(default=None, description="操作对象ID"),
+    current_user: User = Depends(get_current_superuser),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取审计日志列表"""
+    # 构建查询
+    query = select(AuditLog)
+    
+    # 条件过滤
+    if user_id:
+        query = query.where(AuditLog.user_id == user_id)
+    if action:
+        query = query.where(AuditLog.action == action)
+    if target_id:
+        query = query.where((literal(",") + AuditLog.target_ids + ",").like(f"%,{target_id},%"))
+    
+    # 统计总条数
+    count_result = await db.execute(select(func.count()).select_from(query.subquery()))
+    total = count_result.scalar()
+    
+    # 分页查询
+    offset = (page - 1) * pageSize
+    result = await db.execute(query.order_by(AuditLog.id.desc()).offset(offset).limit(pageSize))
+    logs = result.scalars().all()
+    
+    log_list = []
+    for log in logs:
+        log_list.append({
+            "id": log.id,
+            "user_id": log.user_id,
+            "username": log.username,
+            "action": log.action,
+            "target_type": log.target_type,
+            "target_ids": log.target_ids,
+            "detail": log.detail,
+            "created_at": log.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        })
+    
+    response_data = {
+        "items": log_list,
+        "total": total,
+        "page": page,
+        "pageSize": pageSize
+    }
+    
+    return success_response(data=response_data)
+
+@job_manager.handler("stats.recount")
+async def stats_recount_job(context: JobContext, params: Dict[str, Any]):
+    """全量重算系统统计"""
+    await context.set_total(1)
+    reconciled = await system_stats.reconcile()
+    await context.advance()
+    return {"reconciled": reconciled, "drift": system_stats.last_drift}
+
 # 系统状态相关路由
+@router.post("/status/recount", response_model=ResponseBase[Dict[str, Any]])
+async def recount_system_status(
+    current_user: User = Depends(get_current_superuser)
+):
+    """在后台全量重算系统统计"""
+    return await submit_job("stats.recount", {}, current_user, "已提交后台任务")
+
 @router.get("/status", response_model=ResponseBase[Dict[str, Any]])
 async def get_system_status(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取系统状态"""
+    """获取系统状态及用户、菜单统计（内存计数，不查询业务表聚合）"""
+    stats = system_stats.snapshot()
+    
+    # 部门和角色名称来自小表，按ID补充名称
+    dept_result = await db.execute(select(Dept.id, Dept.name))
+    dept_names = {row.id: row.name for row in dept_result.all()}
+    role_result = await db.execute(select(Role.id, Role.name))
+    role_names = {row.id: row.name for row in role_result.all()}
+    
+    users = stats["users"]
+    users["byDept"] = [
+        {"deptId": dept_id, "deptName": dept_names.get(dept_id), "count": count}
+        for dept_id, count in sorted(users["byDept"].items(), key=lambda item: -item[1])
+    ]
+    users["byRole"] = [
+        {"roleId": role_id, "roleName": role_names.get(role_id), "count": count}
+        for role_id, count in sorted(users["byRole"].items(), key=lambda item: -item[1])
+    ]
+    
+    reconciled_at = stats.pop("reconciledAt")
     system_info = {
         "status": "running",
-        "version": "1.0.0",
-        "timestamp": "2024-01-01 00:00:00"
+        "version": settings.version,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "reconciledAt": datetime.fromtimestamp(reconciled_at).strftime("%Y-%m-%d %H:%M:%S") if reconciled_at else None,
+        **stats
     }
     
     return success_response(data=system_info)
@@ -0,0 +1,141 @@
+import json
+import time
+from typing import Any, Dict
+
+from core.config import settings
+from core.health import loop_lag, db_probe
+
+class AIMDLimiter:
+    """AIMD并发限制：请求正常完成时限制缓慢增加（每完成约limit个请求加1），出现过载信号时乘性减小"""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, backoff: float):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.inflight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.decreases = 0
+        self._decreased_at = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.inflight += 1
+        self.admitted += 1
+        return True
+
+    def release(self, overloaded: bool, now: float, cooldown: float) -> None:
+        self.inflight -= 1
+        if overloaded:
+            # 同一批慢请求会陆续完成，冷却期内只减小一次
+            if now - self._decreased_at >= cooldown:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._decreased_at = now
+                self.decreases += 1
+        elif self.inflight + 1 >= self.limit / 2:
+            # 只在并发接近限制时增加，避免空闲期间限制无意义地涨到上限
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "inflight": self.inflight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+        }
+
+class AdmissionController:
+    """准入控制：按路由类别（读/写）限制处理中的请求数，超出限制立即返回503，而不是在连接池和事件循环上排队
+
+    过载信号为请求耗时超过目标、事件循环延迟过高或连接池占满；健康检查、登录鉴权和推送长连接不受限制
+    """
+
+    def __init__(self):
+        self.limiters = {
+            name: AIMDLimiter(
+                settings.admission_initial_limit,
+                settings.admission_min_limit,
+                settings.admission_max_limit,
+                settings.admission_backoff,
+            )
+            for name in ("read", "write")
+        }
+
+    def route_class(self, scope: dict) -> str:
+        """请求所属类别，exempt表示不受限制"""
+        path = scope.get("path", "")
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        if any(path.startswith(prefix) for prefix in settings.admission_exempt_paths):
+            return "exempt"
+        return "read" if scope.get("method") in ("GET", "HEAD", "OPTIONS") else "write"
+
+    def overloaded(self, elapsed: float) -> bool:
+        if elapsed * 1000 > settings.admission_target_latency_ms:
+            return True
+        if loop_lag.lag_ms > settings.admission_max_loop_lag_ms:
+            return True
+        saturation = db_probe.pool_stats()["saturation"]
+        return saturation is not None and saturation >= settings.admission_max_pool_saturation
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.admission_enabled,
+            "loopLagMs": round(loop_lag.lag_ms, 2),
+            "classes": {name: limiter.stats() for name, limiter in self.limiters.items()},
+        }
+
+# 全局准入控制实例
+admission = AdmissionController()
+
+class AdmissionMiddleware:
+    """准入控制中间件"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = admission.route_class(scope)
+        if route_class == "exempt":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = admission.limiters[route_class]
+        if not limiter.try_acquire():
+            await reject(send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            now = time.monotonic()
+            limiter.release(admission.overloaded(now - started), now, settings.admission_cooldown)
+
+async def reject(send) -> None:
+    """返回503并提示客户端稍后重试"""
+    body = json.dumps({
+        "code": 503,
+        "data": None,
+        "error": "服务繁忙，请稍后重试",
+        "message": "Service Unavailable",
+    }, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(settings.admission_retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
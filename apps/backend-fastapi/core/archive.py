@@ -0,0 +1,193 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from core.cache_bus import bus
+from core.change_log import next_change_version, mark_deleted
+from core.config import settings
+from core.database import BulkSessionLocal
+from core.system_stats import system_stats
+from core.user_index import user_index
+from models.dept import Dept
+from models.role import Role
+from models.user import User
+from models.user_role import UserRole
+from models.user_archive import UserArchive
+
+# 归档时原样复制的用户字段
+ARCHIVED_FIELDS = (
+    "id", "username", "password", "nickname", "name", "avatar", "email", "phone",
+    "dept_id", "is_superuser", "token_version", "created_at", "disabled_at",
+)
+
+def split_ids(value: Optional[str]) -> List[int]:
+    """解析逗号分隔的ID"""
+    return [int(item) for item in value.split(",") if item] if value else []
+
+async def archive_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> Tuple[List[int], List[Tuple[bool, Optional[int]]], List[int]]:
+    """将一批禁用时间早于cutoff的用户移入归档表，调用方负责提交事务
+
+    返回(归档的用户ID, 被移除用户的(状态, 部门ID), 被移除的角色关联)，用于发布变更和更新统计
+    """
+    archivable = (User.status == False, User.disabled_at < cutoff)
+    result = await db.execute(select(User.id).where(*archivable).order_by(User.disabled_at).limit(batch_size))
+    candidate_ids = result.scalars().all()
+    if not candidate_ids:
+        return [], [], []
+
+    # 先分配版本号（与其他写入方的加锁顺序一致），再锁定并重新检查候选用户：期间被重新启用的用户不归档
+    version = await next_change_version(db, "sys_user")
+    result = await db.execute(select(User).where(User.id.in_(candidate_ids), *archivable).with_for_update())
+    users = result.scalars().all()
+    if not users:
+        return [], [], []
+
+    ids = [user.id for user in users]
+    role_result = await db.execute(select(UserRole.user_id, UserRole.role_id).where(UserRole.user_id.in_(ids)))
+    user_roles: Dict[int, List[int]] = {}
+    for user_id, role_id in role_result.all():
+        user_roles.setdefault(user_id, []).append(role_id)
+
+    now = datetime.now()
+    rows = []
+    for user in users:
+        row = {field: getattr(user, field) for field in ARCHIVED_FIELDS}
+        row["role_ids"] = ",".join(str(role_id) for role_id in user_roles.get(user.id, []))
+        row["archived_at"] = now
+        rows.append(row)
+
+    # 对增量同步而言归档即删除
+    await mark_deleted(db, "sys_user", ids, version)
+    await db.execute(insert(UserArchive), rows)
+    await db.execute(delete(UserRole).where(UserRole.user_id.in_(ids)))
+    result = await db.execute(delete(User).where(User.id.in_(ids), *archivable))
+    if result.rowcount != len(ids):
+        # 用户已被锁定，不应发生；抛出异常由调用方回滚，避免归档未删除的用户
+        raise RuntimeError("归档期间用户状态发生变化")
+
+    removed = [(False, user.dept_id) for user in users]
+    removed_roles = [role_id for role_ids in user_roles.values() for role_id in role_ids]
+    return ids, removed, removed_roles
+
+async def restore_users(db: AsyncSession, ids: List[int], status: bool = False) -> Tuple[List[int], List[str]]:
+    """将归档用户移回sys_user，调用方负责提交事务；用户名或用户ID已被占用的用户不恢复
+
+    归档后被删除的角色和部门不再关联。返回(恢复的用户ID, 因冲突未恢复的用户名)
+    """
+    # 先分配版本号：与其他写入方的加锁顺序一致，之后的冲突检查不会与并发创建的用户交错
+    version = await next_change_version(db, "sys_user")
+    result = await db.execute(select(UserArchive).where(UserArchive.id.in_(ids)))
+    archived = result.scalars().all()
+    if not archived:
+        return [], []
+
+    # 用户ID沿用原ID，可能已被新用户占用（如SQLite复用删除后的最大ID）
+    taken_result = await db.execute(
+        select(User.id, User.username).where(or_(
+            User.username.in_([item.username for item in archived]),
+            User.id.in_([item.id for item in archived]),
+        ))
+    )
+    taken_ids, taken_names = set(), set()
+    for user_id, username in taken_result.all():
+        taken_ids.add(user_id)
+        taken_names.add(username)
+    conflicts = sorted(item.username for item in archived if item.id in taken_ids or item.username in taken_names)
+    archived = [item for item in archived if item.id not in taken_ids and item.username not in taken_names]
+    if not archived:
+        return [], conflicts
+
+    role_ids = {role_id for item in archived for role_id in split_ids(item.role_ids)}
+    role_result = await db.execute(select(Role.id).where(Role.id.in_(role_ids)))
+    existing_roles = set(role_result.scalars().all())
+    dept_result = await db.execute(select(Dept.id).where(Dept.id.in_({item.dept_id for item in archived})))
+    existing_depts = set(dept_result.scalars().all())
+
+    now = datetime.now()
+    users = []
+    user_roles = []
+    for item in archived:
+        row = {field: getattr(item, field) for field in ARCHIVED_FIELDS}
+        row["status"] = status
+        # 仍为禁用状态时重新计算禁用时间，避免立即被再次归档
+        row["disabled_at"] = None if status else now
+        row["change_version"] = version
+        if row["dept_id"] not in existing_depts:
+            row["dept_id"] = None
+        users.append(row)
+        user_roles.extend(
+            {"user_id": item.id, "role_id": role_id}
+            for role_id in dict.fromkeys(split_ids(item.role_ids)) if role_id in existing_roles
+        )
+
+    restored = [item.id for item in archived]
+    await db.execute(insert(User), users)
+    if user_roles:
+        await db.execute(insert(UserRole), user_roles)
+    await db.execute(delete(UserArchive).where(UserArchive.id.in_(restored)))
+    return restored, conflicts
+
+class UserArchiver:
+    """禁用用户归档任务：定期把长期禁用的用户分批移入归档表，每批一个事务"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.archived = 0
+        self.last_run: Optional[datetime] = None
+
+    async def run_once(self) -> int:
+        """执行一轮归档直到没有符合条件的用户，返回归档的用户数"""
+        async with self._lock:
+            cutoff = datetime.now() - timedelta(days=settings.archive_after_days)
+            total = 0
+            while True:
+                async with BulkSessionLocal() as db:
+                    ids, removed, removed_roles = await archive_batch(db, cutoff, settings.archive_batch_size)
+                    if not ids:
+                        break
+                    await db.commit()
+
+                system_stats.users_deleted(removed, removed_roles)
+                user_index.remove(ids)
+                await bus.publish("sys_user", keys=ids)
+                if removed_roles:
+                    await bus.publish("sys_user_role", keys=ids)
+                total += len(ids)
+                if len(ids) < settings.archive_batch_size:
+                    break
+                await asyncio.sleep(settings.archive_batch_pause)
+
+            self.archived += total
+            self.last_run = datetime.now()
+            if total:
+                print(f"已归档{total}个禁用用户")
+            return total
+
+    def start(self) -> None:
+        """启动后台归档任务"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"用户归档失败：{e}")
+            await asyncio.sleep(settings.archive_interval)
+
+# 全局归档任务
+user_archiver = UserArchiver()
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+
+from core.config import settings
+from core.database import BulkSessionLocal
+from models.audit_log import AuditLog
+
+# 审计详情中需要脱敏的字段
+SENSITIVE_FIELDS = {"password"}
+
+class AuditWriter:
+    """异步批量审计写入器：请求只入队，后台任务按条数或时间阈值批量插入"""
+
+    def __init__(self, queue_size: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(
+        self,
+        user: Any,
+        action: str,
+        target_type: str,
+        target_ids: Optional[Iterable] = None,
+        detail: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """记录一条审计日志，不等待写入；队列满时丢弃并计数"""
+        if detail:
+            detail = {k: ("***" if k in SENSITIVE_FIELDS else v) for k, v in detail.items()}
+        entry = {
+            "user_id": getattr(user, "id", None),
+            "username": getattr(user, "username", None),
+            "action": action,
+            "target_type": target_type,
+            "target_ids": ",".join(str(i) for i in target_ids) if target_ids else None,
+            "detail": json.dumps(detail, ensure_ascii=False, default=str) if detail else None,
+            "created_at": datetime.now(),
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """启动后台写入任务"""
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务，返回前写完队列中剩余的记录"""
+        self._closing = True
+        if self._task:
+            await self._task
+            self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        """写入统计"""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+            elif self._closing:
+                return
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        """收集一批记录，达到批量上限或等待超时即返回"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if self._closing or timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(item)
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            async with BulkSessionLocal() as db:
+                await db.execute(insert(AuditLog), batch)
+                await db.commit()
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"审计日志写入失败：{e}")
+
+# 全局审计写入器
+audit = AuditWriter(settings.audit_queue_size, settings.audit_batch_size, settings.audit_flush_interval)
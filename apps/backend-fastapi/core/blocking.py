@@ -0,0 +1,142 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import settings, PROJECT_ROOT
+from core.request_context import current_route
+
+# 聚合报告最多保留的不同阻塞点数量
+MAX_REPORT_ENTRIES = 200
+
+class BlockingDetector:
+    """事件循环阻塞检测：看门狗线程发现事件循环超过阈值未响应时，抓取阻塞代码的调用栈和当前路由"""
+    
+    def __init__(self, threshold_ms: float):
+        self.threshold = threshold_ms / 1000
+        # 心跳间隔取阈值的五分之一，检测误差不超过该间隔
+        self.tick_interval = self.threshold / 5
+        self._last_tick = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._tick_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._report: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.stalls = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+    
+    def start(self) -> None:
+        """在事件循环线程中调用，启动心跳任务和看门狗线程"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._tick_task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="blocking-watchdog", daemon=True)
+        self._thread.start()
+    
+    async def stop(self) -> None:
+        """停止检测"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._tick_task:
+            self._tick_task.cancel()
+            try:
+                await self._tick_task
+            except asyncio.CancelledError:
+                pass
+            self._tick_task = None
+    
+    def report(self) -> List[Dict[str, Any]]:
+        """按累计阻塞时间倒序的聚合报告"""
+        with self._lock:
+            entries = [dict(entry) for entry in self._report.values()]
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+        return entries
+    
+    def reset(self) -> None:
+        """清空报告"""
+        with self._lock:
+            self._report.clear()
+            self.stalls = 0
+    
+    async def _tick(self) -> None:
+        while True:
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(self.tick_interval)
+    
+    def _watch(self) -> None:
+        stall_tick = None
+        stall: Optional[Dict[str, Any]] = None
+        while not self._stop.wait(self.tick_interval):
+            last_tick = self._last_tick
+            blocked = time.monotonic() - last_tick - self.tick_interval
+            if blocked >= self.threshold:
+                if stall_tick != last_tick:
+                    # 新的阻塞：在阻塞仍在进行时抓取调用栈
+                    stall_tick = last_tick
+                    stall = self._capture()
+                if stall is not None:
+                    stall["blocked"] = blocked
+            elif stall is not None:
+                self._record(stall)
+                stall_tick = None
+                stall = None
+    
+    def _capture(self) -> Optional[Dict[str, Any]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)
+        return {
+            "route": current_route(self._loop) or "-",
+            "location": self._blocking_location(stack),
+            "stack": [f"{f.filename}:{f.lineno} {f.name}" for f in stack[-30:]],
+            "blocked": 0.0,
+        }
+    
+    @staticmethod
+    def _blocking_location(stack: traceback.StackSummary) -> str:
+        """调用栈中最内层的业务代码位置，找不到时使用最内层帧"""
+        for f in reversed(stack):
+            if f.filename.startswith(PROJECT_ROOT) and f"{os.sep}site-packages{os.sep}" not in f.filename:
+                return f"{os.path.relpath(f.filename, PROJECT_ROOT)}:{f.lineno} {f.name}"
+        f = stack[-1]
+        return f"{f.filename}:{f.lineno} {f.name}"
+    
+    def _record(self, stall: Dict[str, Any]) -> None:
+        blocked_ms = round(stall["blocked"] * 1000, 1)
+        key = (stall["route"], stall["location"])
+        with self._lock:
+            self.stalls += 1
+            entry = self._report.get(key)
+            if entry is None:
+                if len(self._report) >= MAX_REPORT_ENTRIES:
+                    return
+                entry = self._report[key] = {
+                    "route": stall["route"],
+                    "location": stall["location"],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "stack": stall["stack"],
+                }
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + blocked_ms, 1)
+            if blocked_ms > entry["max_ms"]:
+                entry["max_ms"] = blocked_ms
+                entry["stack"] = stall["stack"]
+            entry["last_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+# 全局阻塞检测实例（默认关闭，通过blocking_detector_enabled开启）
+blocking_detector = BlockingDetector(settings.blocking_threshold_ms)
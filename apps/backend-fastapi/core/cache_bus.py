@@ -0,0 +1,296 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.cache_event import CacheEventLog
+
+# 单个事件最多携带的主键数量，超出后退化为整表失效
+MAX_EVENT_KEYS = 1000
+# db传输最多同时等待的缺失事件ID数量
+MAX_PENDING_GAPS = 1000
+
+@dataclass
+class CacheEvent:
+    """缓存失效事件"""
+    table: str
+    keys: Tuple[str, ...] = ()
+    version: int = 0
+    origin: str = ""
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def whole_table(self) -> bool:
+        """是否为整表失效"""
+        return not self.keys
+
+Dispatch = Callable[[CacheEvent], None]
+
+class BusTransport(ABC):
+    """传输层接口，外部消息代理（Redis、Kafka等）实现该接口后通过register_transport接入"""
+
+    @abstractmethod
+    async def start(self, dispatch: Dispatch) -> None:
+        """开始接收其他worker的事件，收到后调用dispatch"""
+
+    @abstractmethod
+    async def publish(self, event: CacheEvent) -> int:
+        """发布事件，返回事件版本号"""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """停止接收"""
+
+class LocalTransport(BusTransport):
+    """单进程传输，仅维护本地版本号"""
+
+    def __init__(self):
+        self._version = 0
+
+    async def start(self, dispatch: Dispatch) -> None:
+        pass
+
+    async def publish(self, event: CacheEvent) -> int:
+        self._version += 1
+        return self._version
+
+    async def stop(self) -> None:
+        pass
+
+class DBPollingTransport(BusTransport):
+    """基于事件表轮询的传输，无需额外组件即可跨worker、跨主机生效
+
+    并发发布的事务可能不按自增ID的顺序提交（MySQL中ID 10尚未提交时ID 11已可见），只按最大ID向后读取会永久漏掉
+    较小的ID。读到的ID之间的空缺记为待补读，之后每次轮询一并查询，超过gap_timeout仍未出现的视为已回滚
+    """
+
+    def __init__(self, poll_interval: float, retention_seconds: int, gap_timeout: float):
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.gap_timeout = gap_timeout
+        self._last_id = 0
+        # 待补读的事件ID -> 发现空缺的时间
+        self._gaps: Dict[int, float] = {}
+        self.late_events = 0
+        self.expired_gaps = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, dispatch: Dispatch) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(func.max(CacheEventLog.id)))
+            self._last_id = result.scalar() or 0
+            # 启动时最近发布的事件中可能也有尚未提交的：早于gap_timeout的最后一个事件之后的空缺都需要补读
+            result = await db.execute(
+                select(func.max(CacheEventLog.id)).where(CacheEventLog.created_ts < time.time() - self.gap_timeout)
+            )
+            settled_id = max(result.scalar() or 0, self._last_id - MAX_PENDING_GAPS)
+            result = await db.execute(select(CacheEventLog.id).where(CacheEventLog.id > settled_id))
+            existing = set(result.scalars().all())
+        now = time.monotonic()
+        self._gaps = {event_id: now for event_id in range(settled_id + 1, self._last_id) if event_id not in existing}
+        self._task = asyncio.create_task(self._poll_loop(dispatch))
+
+    async def publish(self, event: CacheEvent) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                insert(CacheEventLog).values(
+                    table_name=event.table,
+                    row_keys=",".join(event.keys) or None,
+                    origin=event.origin,
+                    created_ts=event.created_at,
+                )
+            )
+            await db.commit()
+            return result.inserted_primary_key[0]
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _poll_loop(self, dispatch: Dispatch) -> None:
+        """轮询新事件，并定期清理过期事件"""
+        polls = 0
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._poll_once(dispatch)
+                polls += 1
+                if polls % 600 == 0:
+                    await self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"缓存总线轮询失败：{e}")
+
+    async def _poll_once(self, dispatch: Dispatch) -> None:
+        condition = CacheEventLog.id > self._last_id
+        if self._gaps:
+            condition = or_(condition, CacheEventLog.id.in_(list(self._gaps)))
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    CacheEventLog.id,
+                    CacheEventLog.table_name,
+                    CacheEventLog.row_keys,
+                    CacheEventLog.origin,
+                    CacheEventLog.created_ts,
+                )
+                .where(condition)
+                .order_by(CacheEventLog.id)
+                .limit(500)
+            )
+            rows = result.all()
+        now = time.monotonic()
+        for row in rows:
+            if row.id > self._last_id:
+                for event_id in range(max(self._last_id, row.id - MAX_PENDING_GAPS) + 1, row.id):
+                    self._gaps[event_id] = now
+                self._last_id = row.id
+            elif self._gaps.pop(row.id, None) is not None:
+                self.late_events += 1
+            else:
+                continue
+            dispatch(CacheEvent(
+                table=row.table_name,
+                keys=tuple(row.row_keys.split(",")) if row.row_keys else (),
+                version=row.id,
+                origin=row.origin,
+                created_at=row.created_ts,
+            ))
+        expired = [event_id for event_id, found_at in self._gaps.items() if now - found_at > self.gap_timeout]
+        for event_id in expired:
+            del self._gaps[event_id]
+        self.expired_gaps += len(expired)
+        if len(self._gaps) > MAX_PENDING_GAPS:
+            # 只保留最近的空缺
+            for event_id in sorted(self._gaps)[:len(self._gaps) - MAX_PENDING_GAPS]:
+                del self._gaps[event_id]
+
+    async def _prune(self) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(CacheEventLog).where(CacheEventLog.created_ts < time.time() - self.retention_seconds)
+            )
+            await db.commit()
+
+# 外部代理的传输工厂注册表
+_transport_factories: Dict[str, Callable[[], BusTransport]] = {
+    "local": LocalTransport,
+    "db": lambda: DBPollingTransport(
+        settings.cache_bus_poll_interval,
+        settings.cache_bus_retention_seconds,
+        settings.cache_bus_gap_timeout,
+    ),
+}
+
+def register_transport(name: str, factory: Callable[[], BusTransport]) -> None:
+    """注册自定义传输，配置cache_bus_backend为该名称即可启用"""
+    _transport_factories[name] = factory
+
+class InvalidationBus:
+    """缓存失效总线：任一worker写入后广播带版本号的"表/主键已变更"事件，其他worker据此失效本地缓存"""
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.transport: BusTransport = LocalTransport()
+        self._subscribers: Dict[str, List[Dispatch]] = {}
+        self._versions: Dict[str, int] = {}
+        # 没有带来更大传输层版本号的事件数（本worker发布失败的事件、晚于更大ID提交的事件），
+        # 计入版本号以失效本worker的缓存
+        self._local_versions: Dict[str, int] = {}
+        self._publish_failures: Dict[str, int] = {}
+        # 跨worker传播延迟统计（秒）
+        self._remote_events = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_last = 0.0
+
+    def subscribe(self, table: str, callback: Dispatch) -> None:
+        """订阅表变更事件，table为"*"时订阅所有表；回调应为轻量的同步函数"""
+        self._subscribers.setdefault(table, []).append(callback)
+
+    def version(self, table: str) -> Tuple[int, int]:
+        """本worker已知的表版本号：(传输层事件版本号, 未推进传输层版本号的事件数)，仅用于判断是否变化"""
+        return self._versions.get(table, 0), self._local_versions.get(table, 0)
+
+    async def start(self) -> None:
+        """按配置启动传输"""
+        factory = _transport_factories.get(settings.cache_bus_backend)
+        if factory is None:
+            raise ValueError(f"未知的缓存总线传输：{settings.cache_bus_backend}")
+        self.transport = factory()
+        await self.transport.start(self._on_remote)
+
+    async def stop(self) -> None:
+        """停止传输"""
+        await self.transport.stop()
+
+    async def publish(self, table: str, keys: Optional[Iterable] = None) -> int:
+        """广播变更事件，应在事务提交之后调用；keys为空表示整表变更，返回事件版本号，发布失败时返回0"""
+        key_list = tuple(str(k) for k in keys) if keys else ()
+        if len(key_list) > MAX_EVENT_KEYS:
+            key_list = ()
+        event = CacheEvent(table=table, keys=key_list, origin=self.worker_id)
+        try:
+            event.version = await self.transport.publish(event)
+        except Exception as e:
+            # 写入已提交，广播失败不影响请求结果，其他worker需等待缓存自然过期；
+            # 不能自行编造版本号，否则可能与其他worker随后发布的事件版本号相同，使本worker的缓存无法失效
+            print(f"缓存失效事件发布失败：{e}")
+            event.version = 0
+            self._publish_failures[table] = self._publish_failures.get(table, 0) + 1
+        self._dispatch(event)
+        return event.version
+
+    def stats(self) -> dict:
+        """总线状态与传播延迟"""
+        count = self._remote_events
+        return {
+            "worker_id": self.worker_id,
+            "backend": settings.cache_bus_backend,
+            "versions": dict(self._versions),
+            "publish_failures": dict(self._publish_failures),
+            "late_events": getattr(self.transport, "late_events", 0),
+            "expired_gaps": getattr(self.transport, "expired_gaps", 0),
+            "remote_events": count,
+            "latency_avg_ms": round(self._latency_total / count * 1000, 2) if count else None,
+            "latency_max_ms": round(self._latency_max * 1000, 2),
+            "latency_last_ms": round(self._latency_last * 1000, 2),
+        }
+
+    def _on_remote(self, event: CacheEvent) -> None:
+        """处理来自传输层的事件，忽略本worker自己发布的事件"""
+        if event.origin == self.worker_id:
+            return
+        latency = max(time.time() - event.created_at, 0.0)
+        self._remote_events += 1
+        self._latency_total += latency
+        self._latency_last = latency
+        self._latency_max = max(self._latency_max, latency)
+        self._dispatch(event)
+
+    def _dispatch(self, event: CacheEvent) -> None:
+        if event.version > self._versions.get(event.table, 0):
+            self._versions[event.table] = event.version
+        else:
+            self._local_versions[event.table] = self._local_versions.get(event.table, 0) + 1
+        for callback in self._subscribers.get(event.table, []) + self._subscribers.get("*", []):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"缓存失效回调执行失败：{e}")
+
+# 全局总线实例
+bus = InvalidationBus()
@@ -0,0 +1,187 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from core.config import settings
+from core.database import BulkSessionLocal
+from models.change_sequence import ChangeSequence
+from models.tombstone import Tombstone
+
+# 支持增量同步的表
+TRACKED_TABLES = ("sys_user", "sys_role", "sys_dept", "sys_menu")
+
+async def next_change_version(db: AsyncSession, table: str) -> int:
+    """在调用方的事务中为table分配新的变更版本号
+
+    递增序列行会持有该行的写锁直到事务结束，同一张表的写入因此按提交顺序获得递增的版本号，
+    读取方看到版本号V时，所有版本号不大于V的修改都已提交。应在事务的第一条写语句之前调用：
+    所有写入方都先锁序列行再锁数据行，加锁顺序一致，不会互相死锁；耗时的准备工作（如密码哈希）放在调用之前
+    """
+    result = await db.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.table_name == table)
+        .values(version=ChangeSequence.version + 1)
+    )
+    if not result.rowcount:
+        # 序列行通常在启动时创建
+        await db.execute(insert(ChangeSequence).values(table_name=table, version=1))
+    version_result = await db.execute(select(ChangeSequence.version).where(ChangeSequence.table_name == table))
+    return version_result.scalar()
+
+async def mark_changed(db: AsyncSession, model: Any, ids: Iterable[int]) -> int:
+    """为一批行分配新的变更版本号（用于只修改了关联表的行，如角色授予），返回版本号"""
+    version = await next_change_version(db, model.__tablename__)
+    await db.execute(update(model).where(model.id.in_(list(ids))).values(change_version=version))
+    return version
+
+async def mark_deleted(db: AsyncSession, table: str, ids: Iterable[int], version: Optional[int] = None) -> int:
+    """记录一批行的删除，与删除语句在同一事务中执行，返回版本号；version为调用方已分配的版本号"""
+    ids = list(ids)
+    if version is None:
+        version = await next_change_version(db, table)
+    if ids:
+        now = datetime.now()
+        await db.execute(insert(Tombstone), [
+            {"table_name": table, "row_id": row_id, "version": version, "deleted_at": now}
+            for row_id in ids
+        ])
+    return version
+
+@dataclass
+class ChangeSet:
+    """增量同步结果
+
+    客户端先应用deleted再应用rows，之后以version（以及hasMore时的after）作为下一次请求的since（和after）
+    """
+    rows: List[Any] = field(default_factory=list)
+    deleted: List[int] = field(default_factory=list)
+    version: int = 0
+    after: Optional[int] = None
+    has_more: bool = False
+    reset: bool = False
+
+    def to_dict(self, format_row: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "items": [format_row(row) for row in self.rows],
+            "deleted": self.deleted,
+            "version": self.version,
+            "after": self.after,
+            "hasMore": self.has_more,
+            "reset": self.reset,
+        }
+
+async def load_changes(db: AsyncSession, model: Any, since: int, after: Optional[int], limit: int, options: Iterable = ()) -> ChangeSet:
+    """读取变更版本号在since之后的行和删除记录
+
+    行按(变更版本号, ID)排序，after非空时从(since, after)之后继续，用于同一版本号的行跨页的情况；
+    since为0时返回全部行（包括从未修改过、版本号为0的初始数据）。since早于已清理的删除记录或大于当前版本号时
+    （如数据库被重建），返回全部行并标记reset，客户端应清空本地数据后重新同步
+    """
+    table = model.__tablename__
+    # 先读取序列：之后读到的行不会遗漏版本号不大于该值的修改
+    seq_result = await db.execute(
+        select(ChangeSequence.version, ChangeSequence.pruned_version).where(ChangeSequence.table_name == table)
+    )
+    current, pruned = seq_result.first() or (0, 0)
+
+    changes = ChangeSet()
+    if since and (since < pruned or since > current):
+        changes.reset = True
+        since, after = 0, None
+
+    query = select(model).options(*options)
+    if after is not None:
+        query = query.where(tuple_(model.change_version, model.id) > tuple_(since, after))
+    elif since:
+        query = query.where(model.change_version > since)
+    result = await db.execute(query.order_by(model.change_version, model.id).limit(limit + 1))
+    rows = result.scalars().all()
+
+    changes.has_more = len(rows) > limit
+    changes.rows = rows[:limit]
+    if changes.has_more:
+        last = changes.rows[-1]
+        changes.version, changes.after = last.change_version, last.id
+    else:
+        changes.version = max(current, since)
+
+    if since and changes.version > since:
+        tombstone_result = await db.execute(
+            select(Tombstone.row_id)
+            .where(Tombstone.table_name == table, Tombstone.version > since, Tombstone.version <= changes.version)
+            .order_by(Tombstone.version)
+        )
+        changes.deleted = list(dict.fromkeys(tombstone_result.scalars().all()))
+    return changes
+
+class ChangeLog:
+    """增量同步的序列维护：启动时创建序列行，定期清理过期的删除记录"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.pruned = 0
+
+    async def start(self) -> None:
+        await self.ensure_sequences()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def ensure_sequences(self) -> None:
+        """创建缺少的序列行，避免并发的首次写入同时插入"""
+        async with BulkSessionLocal() as db:
+            result = await db.execute(select(ChangeSequence.table_name))
+            existing = set(result.scalars().all())
+            missing = [table for table in TRACKED_TABLES if table not in existing]
+            if missing:
+                await db.execute(insert(ChangeSequence), [{"table_name": table, "version": 0} for table in missing])
+                await db.commit()
+
+    async def prune(self) -> int:
+        """删除超过保留期的删除记录，并记录被清理的最大版本号，返回清理的条数"""
+        cutoff = datetime.now() - timedelta(days=settings.tombstone_retention_days)
+        total = 0
+        async with BulkSessionLocal() as db:
+            result = await db.execute(
+                select(Tombstone.table_name, func.max(Tombstone.version))
+                .where(Tombstone.deleted_at < cutoff)
+                .group_by(Tombstone.table_name)
+            )
+            for table, version in result.all():
+                deleted = await db.execute(
+                    delete(Tombstone).where(Tombstone.table_name == table, Tombstone.version <= version)
+                )
+                await db.execute(
+                    update(ChangeSequence)
+                    .where(ChangeSequence.table_name == table, ChangeSequence.pruned_version < version)
+                    .values(pruned_version=version)
+                )
+                total += deleted.rowcount
+            await db.commit()
+        self.pruned += total
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"清理删除记录失败：{e}")
+            await asyncio.sleep(settings.tombstone_prune_interval)
+
+# 全局增量同步序列维护实例
+change_log = ChangeLog()
@@ -1,7 +1,11 @@
-from typing import List
+import os
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
+# 项目根目录（backend-fastapi），分析报告中的文件路径相对于此目录显示
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Settings(BaseSettings):
     """项目配置类"""
     # 项目基本信息
@@ -11,12 +15,37 @@ class Settings(BaseSettings):
     
     # 数据库配置
     database_url: str = Field(..., description="数据库连接URL")
+    database_auto_create: bool = Field(default=True, description="启动时数据库不存在则自动创建，确定已存在时可关闭以跳过检查")
+    db_pool_size: int = Field(default=5, description="连接池常驻连接数")
+    db_max_overflow: int = Field(default=10, description="连接池允许的额外连接数")
+    db_pool_timeout: float = Field(default=30, description="从连接池获取连接的超时时间（秒）")
+    db_pool_recycle: int = Field(default=3600, description="连接回收时间（秒）")
+    db_pool_warmup: bool = Field(default=True, description="启动时并发建立常驻连接")
+    # 登录鉴权和重查询/后台任务使用独立的连接池，上面的配置用于普通接口（interactive）
+    db_auth_pool_size: int = Field(default=2, description="auth连接池常驻连接数（登录、刷新令牌、鉴权查询用户）")
+    db_auth_max_overflow: int = Field(default=3, description="auth连接池允许的额外连接数")
+    db_bulk_pool_size: int = Field(default=2, description="bulk连接池常驻连接数（重查询、后台任务、统计重算）")
+    db_bulk_max_overflow: int = Field(default=2, description="bulk连接池允许的额外连接数")
+    
+    # SQLite配置（DATABASE_URL为sqlite+aiosqlite:///路径时生效），适用于单节点部署和本地基准测试
+    sqlite_journal_mode: str = Field(default="WAL", description="日志模式，WAL下读写互不阻塞")
+    sqlite_synchronous: str = Field(default="NORMAL", description="同步级别，WAL下NORMAL即可保证数据库不损坏")
+    sqlite_cache_size: int = Field(default=-65536, description="页缓存大小，负数表示KiB，默认64MB")
+    sqlite_mmap_size: int = Field(default=268435456, description="内存映射读取的大小（字节），默认256MB")
+    sqlite_busy_timeout: int = Field(default=5000, description="数据库被其他进程锁定时的等待时间（毫秒）")
+    sqlite_serialize_writes: bool = Field(default=True, description="进程内串行化写事务，避免并发写入时出现database is locked")
+    
+    # 密码哈希配置：第一个方案用于新密码，其余方案仅用于校验旧密码，登录成功后自动升级
+    password_schemes: List[str] = Field(default_factory=lambda: ["pbkdf2_sha256", "bcrypt"])
+    pbkdf2_rounds: int = Field(default=29000, description="pbkdf2_sha256迭代次数，决定登录时的哈希耗时")
+    bcrypt_rounds: int = Field(default=12, description="bcrypt成本因子")
     
     # JWT配置
     secret_key: str = Field(..., description="JWT密钥")
     algorithm: str = Field(default="HS256")
     access_token_expire_minutes: int = Field(default=30)
     refresh_token_expire_days: int = Field(default=7)
+    token_claims_enabled: bool = Field(default=False, description="访问令牌携带用户ID、超管标记、角色和令牌版本，鉴权时不再查询用户表")
     
     # CORS配置
     allowed_origins: List[str] = Field(default_factory=lambda: ["*"])
@@ -26,6 +55,87 @@ class Settings(BaseSettings):
     
     # 服务端口
     port: int = Field(default=3001)
+
+    # 缓存失效总线配置（多worker之间广播"表/主键已变更"事件）
+    cache_bus_backend: str = Field(default="db", description="传输方式：local单进程，db轮询版本表，或已注册的外部代理名称")
+    cache_bus_poll_interval: float = Field(default=0.5, description="db传输的轮询间隔（秒）")
+    cache_bus_retention_seconds: int = Field(default=3600, description="事件表保留时长（秒）")
+    cache_bus_gap_timeout: float = Field(default=10, description="db传输补读乱序提交事件的等待时长（秒），超过后视为已回滚")
+
+    # 审计日志配置（内存队列+后台批量写入）
+    audit_queue_size: int = Field(default=10000, description="审计队列容量，队列满时丢弃新记录")
+    audit_batch_size: int = Field(default=200, description="单次批量写入的最大条数")
+    audit_flush_interval: float = Field(default=1.0, description="批量写入的最长等待时间（秒）")
+
+    # 就绪检查配置（/ready），超过阈值即报告未就绪
+    ready_max_db_latency_ms: float = Field(default=500, description="数据库ping延迟阈值（毫秒）")
+    ready_max_pool_saturation: float = Field(default=0.9, description="连接池占用率阈值（0~1）")
+    ready_max_loop_lag_ms: float = Field(default=200, description="事件循环延迟阈值（毫秒）")
+    ready_db_ping_ttl: float = Field(default=0.5, description="数据库ping结果的复用时间（秒），避免频繁探测放大压力")
+    loop_lag_interval: float = Field(default=0.1, description="事件循环延迟采样间隔（秒）")
+    
+    # 事件循环阻塞检测（默认关闭）
+    blocking_detector_enabled: bool = Field(default=False, description="是否启用事件循环阻塞检测")
+    blocking_threshold_ms: float = Field(default=100, description="事件循环无响应超过该时间（毫秒）即记录为阻塞")
+    
+    # 按需CPU采样分析的上限，控制采样开销
+    profiler_max_hz: int = Field(default=250, description="最大采样频率（次/秒）")
+    profiler_max_duration: float = Field(default=60, description="单次采样最长时间（秒）")
+    
+    # 系统统计（/system/status）：写操作增量更新，定期全量重算校正
+    stats_reconcile_interval: float = Field(default=300, description="全量重算间隔（秒）")
+    
+    # 准入控制：按读/写类别以AIMD方式限制处理中的请求数，超出时立即返回503
+    admission_enabled: bool = Field(default=True, description="是否启用准入控制")
+    admission_initial_limit: int = Field(default=64, description="每个类别的初始并发限制")
+    admission_min_limit: int = Field(default=4, description="并发限制下限")
+    admission_max_limit: int = Field(default=512, description="并发限制上限")
+    admission_backoff: float = Field(default=0.7, description="出现过载信号时并发限制乘以该系数")
+    admission_cooldown: float = Field(default=1.0, description="两次减小并发限制的最短间隔（秒）")
+    admission_target_latency_ms: float = Field(default=1000, description="请求耗时超过该值视为过载信号（毫秒）")
+    admission_max_loop_lag_ms: float = Field(default=100, description="事件循环延迟超过该值视为过载信号（毫秒）")
+    admission_max_pool_saturation: float = Field(default=1.0, description="连接池占用率达到该值视为过载信号（0~1）")
+    admission_retry_after: int = Field(default=1, description="503响应的Retry-After（秒）")
+    admission_exempt_paths: List[str] = Field(
+        default_factory=lambda: ["/health", "/ready", "/auth/", "/monitor/", "/events/stream"],
+        description="不受限制的路径前缀：健康检查、登录鉴权、监控诊断和推送长连接"
+    )
+    
+    # 语句超时与断线取消（对使用guard_queries的路由生效），超时或客户端断开时在数据库端取消正在执行的语句
+    statement_timeout: float = Field(default=10, description="默认语句超时（秒），0表示不限制")
+    statement_timeouts: Dict[str, float] = Field(default_factory=dict, description='按路由覆盖语句超时，如{"GET /system/user/list": 5}')
+    disconnect_check_interval: float = Field(default=0.5, description="请求处理期间检查客户端是否断开的间隔（秒）")
+    
+    # 查询结果缓存：按依赖表的版本号失效
+    query_cache_max_entries: int = Field(default=512, description="缓存条目上限，超出时淘汰最久未使用的条目")
+    user_list_estimate_total: bool = Field(default=False, description="未过滤或只按状态、部门过滤的用户列表直接使用系统统计计数器作为总数，跳过count查询")
+    
+    # 用户前缀索引（/system/user/suggest输入联想），启动后在后台构建
+    user_index_enabled: bool = Field(default=True, description="是否启用内存前缀索引，关闭时联想查询直接查询数据库")
+    user_index_compact_threshold: int = Field(default=10000, description="增量键和屏蔽用户数超过该值时合并进主体")
+    
+    # 禁用用户归档：禁用超过指定天数的用户分批移入sys_user_archive
+    archive_enabled: bool = Field(default=False, description="是否启用后台归档任务")
+    archive_after_days: int = Field(default=90, description="禁用超过该天数的用户被归档")
+    archive_batch_size: int = Field(default=500, description="每批归档的用户数，每批一个事务")
+    archive_interval: float = Field(default=3600, description="归档任务的执行间隔（秒）")
+    archive_batch_pause: float = Field(default=0.1, description="两批之间的间隔（秒），减少对在线请求的影响")
+    
+    # 变更推送（SSE，/events/stream）
+    sse_heartbeat_interval: float = Field(default=15, description="心跳间隔（秒），防止代理断开空闲连接")
+    sse_max_connections: int = Field(default=10000, description="单个worker的最大推送连接数")
+    sse_history_size: int = Field(default=256, description="保留的最近变更通知数，断线重连时据此补发")
+    
+    # 增量同步（/system/*/changes）：删除记录保留的时间，早于保留期的同步请求需全量重新同步
+    tombstone_retention_days: int = Field(default=30, description="删除记录的保留天数")
+    tombstone_prune_interval: float = Field(default=3600, description="清理过期删除记录的间隔（秒）")
+    
+    # 后台任务（批量删除、批量修改状态、统计重算等耗时操作）
+    job_workers: int = Field(default=2, description="每个进程同时执行的任务数")
+    job_queue_size: int = Field(default=100, description="等待执行的任务上限，超过时拒绝提交")
+    job_chunk_size: int = Field(default=500, description="批量任务每个事务处理的条数")
+    job_inline_limit: int = Field(default=500, description="批量操作的条数超过该值时改为后台任务执行")
+    job_progress_interval: float = Field(default=0.5, description="任务进度写入数据库的最短间隔（秒）")
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,12 +1,36 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import text, event
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
 from core.config import settings
+import asyncio
+import os
 import re
+import time
 
 # 从数据库URL中提取数据库名称
 async def create_database_if_not_exists():
     """如果数据库不存在则创建"""
+    if not settings.database_auto_create:
+        return
+    
+    # SQLite数据库文件在首次连接时自动创建，只需确保目录存在
+    if is_sqlite:
+        database = engine.url.database
+        if database and database != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+        return
+    
+    # 先用主引擎直接连接，数据库已存在时无需再创建临时引擎
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return
+    except Exception:
+        pass
+    
     # 提取数据库名称
     db_name_match = re.search(r'/([^/]+)(?:\?|$)', settings.database_url)
     if not db_name_match:
@@ -32,27 +56,213 @@ async def create_database_if_not_exists():
         await temp_engine.dispose()
 
 # 创建异步引擎
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True,
-)
-
-# 创建异步会话工厂
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
-)
+is_sqlite = settings.database_url.startswith("sqlite")
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """记录获取连接等待时间的队列连接池"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.checkouts += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        return connection
+    
+    def stats(self) -> Dict[str, Any]:
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "checked_out": checked_out,
+            "overflow": self.overflow(),
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else None,
+            "waiting": self.waiting,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else None,
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+        }
+
+# 命名连接池：auth登录鉴权，interactive普通接口，bulk重查询和后台任务，互相之间不争抢连接
+POOL_NAMES = ("interactive", "auth", "bulk")
+
+def pool_sizes(name: str) -> Tuple[int, int]:
+    """命名连接池的常驻连接数和额外连接数"""
+    if name == "auth":
+        return settings.db_auth_pool_size, settings.db_auth_max_overflow
+    if name == "bulk":
+        return settings.db_bulk_pool_size, settings.db_bulk_max_overflow
+    return settings.db_pool_size, settings.db_max_overflow
+
+def pool_options(url: str, pool_size: Optional[int] = None, max_overflow: Optional[int] = None) -> dict:
+    """连接池参数，未指定大小时使用interactive连接池的配置"""
+    pool_size = settings.db_pool_size if pool_size is None else pool_size
+    max_overflow = settings.db_max_overflow if max_overflow is None else max_overflow
+    if url.startswith("sqlite"):
+        # 内存数据库只能使用驱动默认的单连接池；文件数据库默认每次新建连接，
+        # 改用队列连接池以复用连接，PRAGMA也只需在建立连接时执行一次
+        if ":memory:" in url or url.rstrip("/").endswith(":"):
+            return {}
+        return {
+            "poolclass": MeteredPool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+        }
+    return {
+        "poolclass": MeteredPool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+
+def sqlite_pragmas() -> list:
+    """SQLite连接参数：WAL模式下读写互不阻塞，NORMAL同步级别在WAL下不会损坏数据库，仅断电时可能丢失最近的事务"""
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA cache_size={settings.sqlite_cache_size}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}",
+        "PRAGMA foreign_keys=ON",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+def create_engine(url: str, echo: bool = False, pool_size: Optional[int] = None, max_overflow: Optional[int] = None) -> AsyncEngine:
+    """按数据库类型创建异步引擎，SQLite在每个新连接上应用PRAGMA"""
+    new_engine = create_async_engine(url, echo=echo, future=True, **pool_options(url, pool_size, max_overflow))
+    
+    if url.startswith("sqlite"):
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in sqlite_pragmas():
+                cursor.execute(pragma)
+            cursor.close()
+    
+    return new_engine
+
+engines: Dict[str, AsyncEngine] = {
+    name: create_engine(settings.database_url, settings.debug, *pool_sizes(name))
+    for name in POOL_NAMES
+}
+# 默认引擎（interactive），建库、建表和健康检查使用
+engine = engines["interactive"]
+
+# SQLite同一时刻只允许一个写事务，进程内的写事务通过该锁排队
+sqlite_write_lock = asyncio.Lock()
+
+class SerializedWriteSession(AsyncSession):
+    """SQLite会话：首次写入（DML语句或刷新待写对象）时获取进程内写锁，提交、回滚或关闭时释放
+
+    SQLite驱动只在第一条写语句前开启事务，因此持锁期间不会出现读事务升级为写事务失败的情况，
+    并发的写请求在锁上排队，而不是返回database is locked；跨进程的写入由busy_timeout等待
+    """
+    
+    _holds_write_lock = False
+    
+    async def _acquire_write_lock(self):
+        if not self._holds_write_lock:
+            await sqlite_write_lock.acquire()
+            self._holds_write_lock = True
+    
+    def _release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            sqlite_write_lock.release()
+    
+    def _has_pending_writes(self) -> bool:
+        return bool(self.new or self.dirty or self.deleted)
+    
+    async def execute(self, statement, *args, **kwargs):
+        if getattr(statement, "is_dml", False):
+            await self._acquire_write_lock()
+        return await super().execute(statement, *args, **kwargs)
+    
+    async def flush(self, objects=None):
+        if self._has_pending_writes():
+            await self._acquire_write_lock()
+        await super().flush(objects)
+    
+    async def commit(self):
+        if self._has_pending_writes():
+            await self._acquire_write_lock()
+        try:
+            await super().commit()
+        finally:
+            self._release_write_lock()
+    
+    async def rollback(self):
+        try:
+            await super().rollback()
+        finally:
+            self._release_write_lock()
+    
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            self._release_write_lock()
+
+def session_class(url: str) -> type:
+    """会话类，SQLite按配置串行化写事务"""
+    if url.startswith("sqlite") and settings.sqlite_serialize_writes:
+        return SerializedWriteSession
+    return AsyncSession
+
+# 创建异步会话工厂，每个命名连接池一个
+session_factories = {
+    name: sessionmaker(
+        engines[name],
+        class_=session_class(settings.database_url),
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+    )
+    for name in POOL_NAMES
+}
+AsyncSessionLocal = session_factories["interactive"]
+AuthSessionLocal = session_factories["auth"]
+BulkSessionLocal = session_factories["bulk"]
+
+# 当前请求使用的连接池，由路由依赖use_pool设置
+current_pool: ContextVar[str] = ContextVar("current_pool", default="interactive")
+
+def use_pool(name: str):
+    """路由依赖：本请求内get_db从指定的命名连接池获取会话"""
+    if name not in session_factories:
+        raise ValueError(f"未知的连接池：{name}")
+    
+    async def select_pool():
+        current_pool.set(name)
+    
+    return select_pool
 
 # 创建基础模型类
 Base = declarative_base()
 
 async def get_db():
-    """获取数据库会话"""
-    async with AsyncSessionLocal() as session:
+    """获取数据库会话，连接来自当前请求选择的连接池"""
+    async with session_factories[current_pool.get()]() as session:
         try:
             yield session
         finally:
@@ -67,3 +277,32 @@ async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+
+async def warm_pool():
+    """并发建立interactive和auth连接池的常驻连接，避免首批请求承担建连开销；bulk连接池按需建立"""
+    if not settings.db_pool_warmup or not hasattr(engine.pool, "size"):
+        return
+    
+    async def connect(target: AsyncEngine):
+        conn = await target.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+    
+    # 同时持有所有连接，确保建立的是不同的连接，之后统一归还连接池
+    targets = [engines[name] for name in ("interactive", "auth") for _ in range(pool_sizes(name)[0])]
+    conns = await asyncio.gather(*(connect(target) for target in targets), return_exceptions=True)
+    for conn in conns:
+        if not isinstance(conn, BaseException):
+            await conn.close()
+
+async def dispose_engines():
+    """关闭所有命名连接池的连接；aiosqlite的连接线程不是守护线程，不关闭会阻止进程退出"""
+    for target in engines.values():
+        await target.dispose()
+
+def pool_stats(name: str = "interactive") -> Dict[str, Any]:
+    """命名连接池的占用和等待情况，非队列连接池（如SQLite内存数据库）返回None"""
+    pool = engines[name].pool
+    if not isinstance(pool, MeteredPool):
+        return {"saturation": None}
+    return pool.stats()
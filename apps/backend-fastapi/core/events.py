@@ -0,0 +1,136 @@
+import asyncio
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, FrozenSet, Optional, Set
+
+from core.cache_bus import bus, CacheEvent
+from core.config import settings
+
+# 推送主题：menu菜单变更，codes权限变更，user当前用户状态变更
+ALL_TOPICS = frozenset({"menu", "codes", "user"})
+
+# 表变更对应的推送主题，以及是否只通知主键对应的用户
+TABLE_TOPICS = {
+    "sys_menu": (frozenset({"menu"}), False),
+    "sys_role": (frozenset({"menu", "codes"}), False),
+    "sys_user_role": (frozenset({"codes"}), True),
+    "sys_user": (frozenset({"user", "codes"}), True),
+}
+
+@dataclass(frozen=True)
+class ChangeNotice:
+    """一条变更通知，user_ids为None表示通知所有用户"""
+    seq: int
+    topics: FrozenSet[str]
+    user_ids: Optional[FrozenSet[int]] = None
+
+class ChangeBroadcaster:
+    """变更广播：所有连接共享一个序号和一个唤醒事件，连接本身只保存上次发送的序号
+
+    表变更和心跳都会唤醒所有连接，被唤醒的连接根据序号从最近的通知中计算需要推送的主题，
+    无需为每个连接维护队列或定时器，空闲连接只占用一个等待中的future
+    """
+
+    def __init__(self, history_size: int, heartbeat_interval: float):
+        # 每次启动的标识，客户端携带其他worker或旧进程的Last-Event-ID重连时需要全量刷新
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.heartbeat_interval = heartbeat_interval
+        self.connections = 0
+        self.closed = False
+        self._history: Deque[ChangeNotice] = deque(maxlen=history_size)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def on_table_changed(self, event: CacheEvent) -> None:
+        """表变更后记录通知并唤醒所有连接"""
+        topics, per_user = TABLE_TOPICS[event.table]
+        user_ids = None
+        if per_user and not event.whole_table:
+            user_ids = frozenset(int(key) for key in event.keys)
+        self.seq += 1
+        self._history.append(ChangeNotice(self.seq, topics, user_ids))
+        self._wake()
+
+    def try_acquire(self, limit: int) -> bool:
+        """占用一个推送连接名额，已达上限时返回False；检查与占用之间没有await，并发建立的连接不会同时通过检查"""
+        if self.connections >= limit:
+            return False
+        self.connections += 1
+        return True
+
+    def release(self) -> None:
+        """归还推送连接名额"""
+        self.connections -= 1
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_event_id(self, value: Optional[str]) -> Optional[int]:
+        """解析Last-Event-ID，非本进程签发或已超出当前序号时返回None"""
+        if not value:
+            return None
+        epoch, _, seq = value.partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.seq:
+            return None
+        return int(seq)
+
+    def topics_since(self, seq: int, user_id: Optional[int]) -> Set[str]:
+        """序号seq之后与该用户相关的主题；通知已被淘汰时返回全部主题"""
+        if seq >= self.seq:
+            return set()
+        if not self._history or self._history[0].seq > seq + 1:
+            return set(ALL_TOPICS)
+        topics: Set[str] = set()
+        for notice in reversed(self._history):
+            if notice.seq <= seq:
+                break
+            if notice.user_ids is None or user_id in notice.user_ids:
+                topics |= notice.topics
+        return topics
+
+    async def wait(self, seq: int) -> None:
+        """等待序号变化或下一次心跳"""
+        if self.seq != seq or self.closed:
+            return
+        await self._wakeup.wait()
+
+    def start(self) -> None:
+        """启动心跳任务"""
+        self.closed = False
+        self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """停止心跳并结束所有连接"""
+        self.closed = True
+        self._wake()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "connections": self.connections,
+            "history": len(self._history),
+        }
+
+    def _wake(self) -> None:
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self._wake()
+
+# 全局变更广播实例
+change_broadcaster = ChangeBroadcaster(settings.sse_history_size, settings.sse_heartbeat_interval)
+for _table in TABLE_TOPICS:
+    bus.subscribe(_table, change_broadcaster.on_table_changed)
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from core.config import settings
+from core.database import engine, pool_stats, POOL_NAMES
+
+class LoopLagMonitor:
+    """事件循环延迟监测：周期性休眠，实际唤醒时间超出预期的部分即为延迟"""
+    
+    def __init__(self, interval: float, window: int = 20):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """启动监测任务"""
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """停止监测任务"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    @property
+    def lag_ms(self) -> float:
+        """最近采样窗口内的最大延迟（毫秒）"""
+        return max(self._samples, default=0.0) * 1000
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(loop.time() - started - self.interval, 0.0))
+
+class DatabaseProbe:
+    """数据库探测：ping延迟和连接池占用，ping结果短时间复用"""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._checked_at = 0.0
+        self._latency_ms: Optional[float] = None
+        self._error: Optional[str] = None
+        self._lock = asyncio.Lock()
+    
+    async def ping(self) -> Dict[str, Any]:
+        """执行SELECT 1并返回延迟，并发调用共享同一次探测"""
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= self.ttl:
+                started = time.perf_counter()
+                try:
+                    # 获取连接也计入超时：连接池占满时不等待db_pool_timeout，直接报告未就绪
+                    await asyncio.wait_for(self._select_one(), timeout=settings.ready_max_db_latency_ms / 1000 * 2)
+                    self._latency_ms = (time.perf_counter() - started) * 1000
+                    self._error = None
+                except Exception as e:
+                    self._latency_ms = None
+                    self._error = str(e) or e.__class__.__name__
+                self._checked_at = time.monotonic()
+        return {"latency_ms": self._latency_ms, "error": self._error}
+    
+    @staticmethod
+    async def _select_one() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    
+    @staticmethod
+    def pool_stats(name: str = "interactive") -> Dict[str, Any]:
+        """命名连接池的占用情况，非队列连接池（如SQLite内存数据库）返回None"""
+        return pool_stats(name)
+
+# 全局监测实例
+loop_lag = LoopLagMonitor(settings.loop_lag_interval)
+db_probe = DatabaseProbe(settings.ready_db_ping_ttl)
+
+async def readiness() -> Dict[str, Any]:
+    """汇总就绪状态，任一指标超过阈值即为未就绪"""
+    db = await db_probe.ping()
+    pools = {name: db_probe.pool_stats(name) for name in POOL_NAMES}
+    pool = pools["interactive"]
+    lag_ms = round(loop_lag.lag_ms, 2)
+    
+    reasons = []
+    if db["error"] is not None:
+        reasons.append("database unreachable")
+    elif db["latency_ms"] > settings.ready_max_db_latency_ms:
+        reasons.append("database latency too high")
+    if pool["saturation"] is not None and pool["saturation"] >= settings.ready_max_pool_saturation:
+        reasons.append("connection pool saturated")
+    if lag_ms > settings.ready_max_loop_lag_ms:
+        reasons.append("event loop lagging")
+    
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "database": {
+            "latency_ms": round(db["latency_ms"], 2) if db["latency_ms"] is not None else None,
+            "error": db["error"],
+        },
+        "pool": pool,
+        "pools": pools,
+        "loop_lag_ms": lag_ms,
+    }
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import case, update
+from sqlalchemy.future import select
+
+from core.cache_bus import bus
+from core.config import settings
+from core.database import BulkSessionLocal
+from models.job import Job
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    """任务已被请求取消"""
+
+class JobQueueFull(Exception):
+    """等待执行的任务已达上限"""
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    """按size切分列表"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class JobContext:
+    """任务执行上下文：汇报进度并在检查点响应取消请求"""
+
+    def __init__(self, manager: "JobManager", job_id: int):
+        self.manager = manager
+        self.job_id = job_id
+        self.total = 0
+        self.done = 0
+        self._saved_at = 0.0
+
+    async def set_total(self, total: int) -> None:
+        self.total = total
+        await self._save(force=True)
+
+    async def advance(self, count: int = 1) -> None:
+        """完成count项，按间隔写入进度；已请求取消时抛出JobCancelled"""
+        self.done += count
+        await self._save()
+
+    async def checkpoint(self) -> None:
+        """检查取消请求"""
+        await self._save()
+
+    async def _save(self, force: bool = False) -> None:
+        if self.job_id in self.manager._cancelled:
+            raise JobCancelled()
+        now = time.monotonic()
+        if not force and now - self._saved_at < settings.job_progress_interval:
+            return
+        self._saved_at = now
+        # 写入进度的同时读取取消标记，其他worker提交的取消请求也能被感知
+        async with BulkSessionLocal() as db:
+            await db.execute(update(Job).where(Job.id == self.job_id).values(total=self.total, done=self.done))
+            result = await db.execute(select(Job.cancel_requested).where(Job.id == self.job_id))
+            cancel_requested = result.scalar()
+            await db.commit()
+        if cancel_requested:
+            raise JobCancelled()
+
+JobHandler = Callable[[JobContext, Dict[str, Any]], Awaitable[Any]]
+
+class JobManager:
+    """进程内后台任务：任务状态持久化在sys_job表，由固定数量的worker协程执行，队列满时拒绝提交"""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.worker_id = bus.worker_id
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        # 已占用队列位置、正在写入数据库的提交数
+        self._reserved = 0
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[int, str] = {}
+        self._cancelled: set = set()
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def handler(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """注册任务处理函数"""
+        def register(fn: JobHandler) -> JobHandler:
+            self._handlers[kind] = fn
+            return fn
+        return register
+
+    async def submit(self, kind: str, params: Dict[str, Any], user: Any = None) -> int:
+        """创建任务并加入队列，返回任务ID"""
+        if kind not in self._handlers:
+            raise ValueError(f"未知的任务类型：{kind}")
+        if self._queue is None or self._queue.qsize() + self._reserved >= self.queue_size:
+            raise JobQueueFull()
+
+        # 写入数据库之前占用队列位置，并发提交不会在任务已写入后才发现队列已满
+        self._reserved += 1
+        try:
+            job_id = await self._create(kind, params, user)
+            self._queue.put_nowait(job_id)
+        finally:
+            self._reserved -= 1
+        return job_id
+
+    async def _create(self, kind: str, params: Dict[str, Any], user: Any) -> int:
+        async with BulkSessionLocal() as db:
+            job = Job(
+                kind=kind,
+                status=PENDING,
+                params=json.dumps(params, ensure_ascii=False, default=str),
+                total=0,
+                done=0,
+                owner=self.worker_id,
+                created_by=getattr(user, "id", None),
+                created_at=datetime.now(),
+            )
+            db.add(job)
+            await db.commit()
+            return job.id
+
+    async def cancel(self, job_id: int) -> bool:
+        """请求取消任务：等待中的任务直接取消，执行中的任务在下一个检查点停止"""
+        async with BulkSessionLocal() as db:
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status.in_([PENDING, RUNNING]))
+                .values(
+                    cancel_requested=True,
+                    status=case((Job.status == PENDING, CANCELLED), else_=Job.status),
+                    finished_at=case((Job.status == PENDING, datetime.now()), else_=Job.finished_at),
+                )
+            )
+            await db.commit()
+        if job_id in self._running:
+            self._cancelled.add(job_id)
+        return result.rowcount > 0
+
+    async def start(self) -> None:
+        """启动worker，并将本机已退出进程遗留的任务标记为失败"""
+        await self._fail_orphans()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """停止worker，执行中的任务标记为失败"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": dict(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"后台任务{job_id}执行异常：{e}")
+
+    async def _run(self, job_id: int) -> None:
+        async with BulkSessionLocal() as db:
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == PENDING)
+                .values(status=RUNNING, started_at=datetime.now(), owner=self.worker_id)
+            )
+            job_result = await db.execute(select(Job.kind, Job.params).where(Job.id == job_id))
+            job = job_result.first()
+            await db.commit()
+        if not result.rowcount or job is None:
+            # 已在等待期间被取消
+            return
+
+        context = JobContext(self, job_id)
+        self._running[job_id] = job.kind
+        try:
+            output = await self._handlers[job.kind](context, json.loads(job.params or "{}"))
+        except JobCancelled:
+            self.cancelled += 1
+            await self._finish(job_id, context, CANCELLED)
+        except asyncio.CancelledError:
+            self.failed += 1
+            await self._finish(job_id, context, FAILED, error="服务关闭，任务中断")
+            raise
+        except Exception as e:
+            self.failed += 1
+            await self._finish(job_id, context, FAILED, error=str(e) or e.__class__.__name__)
+        else:
+            self.completed += 1
+            await self._finish(job_id, context, SUCCEEDED, output=output)
+        finally:
+            self._running.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    async def _finish(self, job_id: int, context: JobContext, status: str, output: Any = None, error: Optional[str] = None) -> None:
+        async with BulkSessionLocal() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(
+                    status=status,
+                    total=context.total,
+                    done=context.done,
+                    result=json.dumps(output, ensure_ascii=False, default=str) if output is not None else None,
+                    error=error,
+                    finished_at=datetime.now(),
+                )
+            )
+            await db.commit()
+
+    async def _fail_orphans(self) -> None:
+        """本机上已退出的进程遗留的等待中或执行中任务不会再被执行，标记为失败"""
+        host = socket.gethostname()
+        async with BulkSessionLocal() as db:
+            result = await db.execute(
+                select(Job.id, Job.owner).where(Job.status.in_([PENDING, RUNNING]), Job.owner.like(f"{host}:%"))
+            )
+            orphans = [row.id for row in result.all() if not _process_alive(row.owner)]
+            if orphans:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id.in_(orphans))
+                    .values(status=FAILED, error="服务重启，任务中断", finished_at=datetime.now())
+                )
+                await db.commit()
+
+def _process_alive(owner: str) -> bool:
+    pid = owner.rpartition(":")[2]
+    if not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    """任务状态的响应格式"""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "total": job.total,
+        "done": job.done,
+        "progress": round(job.done / job.total * 100, 1) if job.total else None,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "cancelRequested": job.cancel_requested,
+        "createdBy": job.created_by,
+        "createdAt": job.created_at.strftime("%Y-%m-%d %H:%M:%S") if job.created_at else None,
+        "startedAt": job.started_at.strftime("%Y-%m-%d %H:%M:%S") if job.started_at else None,
+        "finishedAt": job.finished_at.strftime("%Y-%m-%d %H:%M:%S") if job.finished_at else None,
+    }
+
+# 全局任务管理器
+job_manager = JobManager(settings.job_workers, settings.job_queue_size)
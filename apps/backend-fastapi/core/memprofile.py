@@ -0,0 +1,121 @@
+import asyncio
+import re
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from core.config import settings, PROJECT_ROOT
+from core.profiler import ProfilerBusy
+from core.request_context import route_of
+
+class MemoryProfiler:
+    """基于tracemalloc的按路由内存分析：采样期间记录每个请求的峰值分配和净留存内存，并统计分配最多的代码位置"""
+    
+    def __init__(self):
+        self._routes: Optional[Dict[str, Dict[str, Any]]] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._routes is not None
+    
+    async def profile(self, route_pattern: str, duration: float, frames: int, top: int) -> Dict[str, Any]:
+        """开启tracemalloc采样duration秒，返回按路由汇总的内存统计和分配位置排行"""
+        if self.running:
+            raise ProfilerBusy()
+        duration = max(0.1, min(duration, settings.profiler_max_duration))
+        pattern = re.compile(route_pattern)
+        
+        # 若tracemalloc已由其他方式开启，则沿用且结束时不关闭
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(frames)
+        self._routes = {}
+        try:
+            baseline = tracemalloc.take_snapshot()
+            await asyncio.sleep(duration)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            routes, self._routes = self._routes, None
+            if started_here:
+                tracemalloc.stop()
+        
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        baseline = baseline.filter_traces(filters)
+        snapshot = snapshot.filter_traces(filters)
+        
+        return {
+            "route": route_pattern,
+            "duration": duration,
+            "routes": sorted(
+                (stats for route, stats in routes.items() if pattern.search(route)),
+                key=lambda s: s["peak_max_kb"],
+                reverse=True
+            ),
+            # 采样期间净增长最多的位置（可能的泄漏点）
+            "top_retained": self._top(snapshot.compare_to(baseline, "lineno"), top, "size_diff"),
+            # 当前存活内存最多的位置
+            "top_allocated": self._top(snapshot.statistics("lineno"), top, "size"),
+        }
+    
+    def record(self, route: str, before: int, peak: int, after: int) -> None:
+        """记录一个请求的内存变化（字节）"""
+        routes = self._routes
+        if routes is None:
+            return
+        stats = routes.get(route)
+        if stats is None:
+            stats = routes[route] = {
+                "route": route,
+                "requests": 0,
+                "peak_max_kb": 0.0,
+                "peak_total_kb": 0.0,
+                "retained_total_kb": 0.0,
+            }
+        peak_kb = max(peak - before, 0) / 1024
+        stats["requests"] += 1
+        stats["peak_max_kb"] = round(max(stats["peak_max_kb"], peak_kb), 1)
+        stats["peak_total_kb"] = round(stats["peak_total_kb"] + peak_kb, 1)
+        stats["retained_total_kb"] = round(stats["retained_total_kb"] + (after - before) / 1024, 1)
+        stats["peak_avg_kb"] = round(stats["peak_total_kb"] / stats["requests"], 1)
+    
+    @staticmethod
+    def _top(statistics: List[Any], top: int, field: str) -> List[Dict[str, Any]]:
+        items = sorted(statistics, key=lambda s: abs(getattr(s, field)), reverse=True)[:top]
+        result = []
+        for stat in items:
+            frame = stat.traceback[0]
+            filename = frame.filename
+            if filename.startswith(PROJECT_ROOT):
+                filename = filename[len(PROJECT_ROOT) + 1:]
+            result.append({
+                "location": f"{filename}:{frame.lineno}",
+                "size_kb": round(getattr(stat, field) / 1024, 1),
+                "count": getattr(stat, "count_diff" if field == "size_diff" else "count"),
+            })
+        return result
+
+class MemoryProfileMiddleware:
+    """采样期间测量每个请求的内存峰值和净留存；未采样时直接放行。并发请求共享全局峰值，结果为近似值"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not memory_profiler.running:
+            await self.app(scope, receive, send)
+            return
+        
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if tracemalloc.is_tracing():
+                after, peak = tracemalloc.get_traced_memory()
+                memory_profiler.record(route_of(scope), before, peak, after)
+
+# 全局内存分析器实例，仅在调用接口时开启tracemalloc
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from core.config import settings, PROJECT_ROOT
+from core.request_context import current_route
+
+class ProfilerBusy(Exception):
+    """已有采样会话在运行"""
+
+class RouteProfiler:
+    """按路由的采样CPU分析：采样线程定时抓取事件循环线程的调用栈，仅统计正在执行匹配路由的样本"""
+    
+    def __init__(self, max_stacks: int = 5000, max_depth: int = 64):
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self._running = False
+    
+    @property
+    def running(self) -> bool:
+        return self._running
+    
+    async def profile(self, route_pattern: str, hz: int, duration: float) -> Dict[str, Any]:
+        """采样duration秒，返回折叠栈统计；hz和duration受配置上限约束"""
+        if self._running:
+            raise ProfilerBusy()
+        hz = max(1, min(hz, settings.profiler_max_hz))
+        duration = max(0.1, min(duration, settings.profiler_max_duration))
+        pattern = re.compile(route_pattern)
+        
+        loop = asyncio.get_running_loop()
+        loop_thread_id = threading.get_ident()
+        stop = threading.Event()
+        result = {"stacks": Counter(), "samples": 0, "matched": 0, "dropped": 0}
+        
+        def sample():
+            interval = 1 / hz
+            while not stop.wait(interval):
+                result["samples"] += 1
+                route = current_route(loop)
+                if route is None or not pattern.search(route):
+                    continue
+                frame = sys._current_frames().get(loop_thread_id)
+                if frame is None:
+                    continue
+                stack = self._collapse(route, frame)
+                if stack in result["stacks"] or len(result["stacks"]) < self.max_stacks:
+                    result["stacks"][stack] += 1
+                    result["matched"] += 1
+                else:
+                    result["dropped"] += 1
+        
+        self._running = True
+        thread = threading.Thread(target=sample, name="route-profiler", daemon=True)
+        try:
+            thread.start()
+            await asyncio.sleep(duration)
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join)
+            self._running = False
+        
+        result.update(hz=hz, duration=duration, route=route_pattern)
+        return result
+    
+    def _collapse(self, route: str, frame: Optional[Any]) -> str:
+        """将调用栈转换为折叠栈格式（根在前，分号分隔），根节点为路由"""
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            filename = code.co_filename
+            if filename.startswith(PROJECT_ROOT):
+                filename = os.path.relpath(filename, PROJECT_ROOT)
+            else:
+                filename = os.path.basename(filename)
+            frames.append(f"{code.co_name} ({filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.append(route)
+        return ";".join(reversed(frames))
+
+def to_collapsed(result: Dict[str, Any]) -> str:
+    """输出flamegraph.pl、speedscope等工具可直接加载的折叠栈文本"""
+    return "\n".join(f"{stack} {count}" for stack, count in result["stacks"].most_common()) + "\n"
+
+# 全局分析器实例，仅在调用接口时采样，默认不运行
+route_profiler = RouteProfiler()
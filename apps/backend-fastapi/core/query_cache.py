@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from core.config import settings
+from core.singleflight import singleflight
+from utils.response import success_response
+
+T = TypeVar('T')
+
+class QueryCache:
+    """查询结果缓存：条目记录写入时依赖表的版本号，读取时版本号不一致即视为失效；容量满时淘汰最久未使用的条目
+
+    版本号由缓存失效总线维护，本worker和其他worker的写入都会使其递增，因此无需设置过期时间
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Hashable, Any]]" = OrderedDict()
+        # 按名称统计：hits命中，misses未命中（含版本失效），stale版本失效
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def get_or_load(self, name: str, key: Hashable, version: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        """返回缓存结果，未命中时执行loader，并发的相同未命中请求只执行一次"""
+        cache_key = (name, key)
+        stats = self._stats.setdefault(name, {"hits": 0, "misses": 0, "stale": 0})
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            if entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                stats["hits"] += 1
+                return entry[1]
+            stats["stale"] += 1
+            del self._entries[cache_key]
+        stats["misses"] += 1
+
+        # version在加载前读取：加载期间发生的写入会使版本号递增，本次结果不会再被命中
+        value = await singleflight.do(name, (key, version), loader)
+        self._entries[cache_key] = (version, value)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    async def response(
+        self,
+        name: str,
+        key: Hashable,
+        version: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        encode: Optional[Callable[[Any], bytes]] = None
+    ) -> Response:
+        """缓存序列化后的响应体，命中时无需再次序列化；encode为自定义的响应体序列化"""
+        async def build() -> bytes:
+            data = await loader()
+            if encode is not None:
+                return encode(data)
+            return JSONResponse(content=jsonable_encoder(success_response(data=data))).body
+
+        body = await self.get_or_load(name, key, version, build)
+        return Response(content=body, media_type="application/json")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "routes": {name: dict(value) for name, value in self._stats.items()},
+        }
+
+# 全局查询缓存实例
+query_cache = QueryCache(settings.query_cache_max_entries)
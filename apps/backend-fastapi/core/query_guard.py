@@ -0,0 +1,156 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+
+from core.config import settings
+from core.database import engine, engines, is_sqlite
+from core.request_context import route_of
+from core.singleflight import LeaderAbandoned
+
+# MySQL错误码：超过max_execution_time
+MYSQL_QUERY_TIMEOUT = 3024
+
+TIMEOUT = "timeout"
+DISCONNECTED = "disconnected"
+
+class QueryTimeout(Exception):
+    """语句执行超时"""
+
+class ClientDisconnected(LeaderAbandoned):
+    """客户端已断开，语句被取消"""
+
+_current_guard: ContextVar[Optional["QueryGuard"]] = ContextVar("query_guard", default=None)
+
+class QueryGuard:
+    """单个请求的查询守卫：记录正在执行的语句，超时或客户端断开时在数据库端取消该语句
+
+    取消后连接上的语句以错误返回，连接本身仍可正常归还连接池；之后该请求的新语句直接拒绝执行
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.reason: Optional[str] = None
+        self.driver_connection: Any = None
+        self.started_at: Optional[float] = None
+        self._cancelling: Optional[asyncio.Future] = None
+
+    def error(self) -> Exception:
+        return QueryTimeout() if self.reason == TIMEOUT else ClientDisconnected()
+
+    def statement_started(self, driver_connection: Any) -> None:
+        if self.reason:
+            raise self.error()
+        self.driver_connection = driver_connection
+        self.started_at = time.monotonic()
+
+    def statement_finished(self) -> None:
+        self.started_at = None
+
+    @property
+    def cancel_pending(self) -> bool:
+        """取消请求已发出但尚未完成，此时归还的连接上可能随后到达KILL QUERY"""
+        return self._cancelling is not None and not self._cancelling.done()
+
+    async def watch(self, request: Request) -> None:
+        """定期检查客户端是否断开、语句是否超时"""
+        while self.reason is None:
+            await asyncio.sleep(settings.disconnect_check_interval)
+            if await request.is_disconnected():
+                self.reason = DISCONNECTED
+            elif self.timeout and self.started_at is not None and time.monotonic() - self.started_at > self.timeout:
+                self.reason = TIMEOUT
+            else:
+                continue
+            if self.started_at is not None:
+                self._cancelling = asyncio.ensure_future(cancel_statement(self.driver_connection))
+                await asyncio.shield(self._cancelling)
+
+    async def close(self, watcher: asyncio.Task) -> None:
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+        if self._cancelling is not None:
+            await asyncio.gather(self._cancelling, return_exceptions=True)
+
+async def cancel_statement(driver_connection: Any) -> None:
+    """在数据库端取消连接上正在执行的语句
+
+    在独立任务中执行，任务复制了请求的上下文：先清除其中的查询守卫，否则已触发的守卫会拒绝执行KILL QUERY，
+    执行KILL QUERY的连接归还时也会被当作取消中的连接作废
+    """
+    _current_guard.set(None)
+    try:
+        if is_sqlite:
+            # sqlite3的interrupt可以在其他线程调用，连接空闲时无效果
+            driver_connection._conn.interrupt()
+            return
+        # MySQL需要通过另一条连接中断，只终止语句而不断开连接
+        thread_id = int(driver_connection.thread_id())
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql(f"KILL QUERY {thread_id}")
+    except Exception as e:
+        print(f"取消数据库语句失败：{e}")
+
+def route_timeout(request: Request) -> float:
+    """路由的语句超时（秒），未单独配置时使用默认值"""
+    return settings.statement_timeouts.get(route_of(request.scope), settings.statement_timeout)
+
+async def guard_queries(request: Request) -> AsyncIterator[QueryGuard]:
+    """路由依赖：为本请求内所有会话的语句设置超时，并在客户端断开时取消正在执行的语句"""
+    guard = QueryGuard(route_timeout(request))
+    token = _current_guard.set(guard)
+    watcher = asyncio.ensure_future(guard.watch(request))
+    try:
+        yield guard
+    except QueryTimeout:
+        raise HTTPException(status_code=504, detail="查询超时，请缩小查询范围")
+    except ClientDisconnected:
+        # 客户端已不在，响应不会被接收，499沿用nginx对客户端主动断开的约定
+        raise HTTPException(status_code=499, detail="客户端已断开")
+    finally:
+        await guard.close(watcher)
+        _current_guard.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    guard = _current_guard.get()
+    if guard is None:
+        return statement, parameters
+    guard.statement_started(conn.connection.driver_connection)
+    # MySQL在服务端限制SELECT的执行时间，即使事件循环被阻塞也能生效
+    if engine.dialect.name == "mysql" and guard.timeout:
+        stripped = statement.lstrip()
+        if stripped[:6].upper() == "SELECT":
+            statement = f"SELECT /*+ MAX_EXECUTION_TIME({int(guard.timeout * 1000)}) */{stripped[6:]}"
+    return statement, parameters
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    guard = _current_guard.get()
+    if guard is not None:
+        guard.statement_finished()
+
+def _handle_error(context):
+    guard = _current_guard.get()
+    if guard is None:
+        return
+    guard.statement_finished()
+    args = getattr(context.original_exception, "args", None)
+    if guard.reason is None and args and args[0] == MYSQL_QUERY_TIMEOUT:
+        guard.reason = TIMEOUT
+    if guard.reason:
+        raise guard.error()
+
+def _checkin(dbapi_connection, connection_record):
+    # 语句已结束但KILL QUERY仍在途中时不归还连接，避免中断之后使用该连接的其他请求
+    guard = _current_guard.get()
+    if guard is not None and guard.cancel_pending:
+        connection_record.invalidate()
+
+# 请求内的会话可能来自任一命名连接池
+for _engine in engines.values():
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute, retval=True)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(_engine.sync_engine, "handle_error", _handle_error)
+    event.listen(_engine.sync_engine, "checkin", _checkin)
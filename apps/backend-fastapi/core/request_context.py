@@ -0,0 +1,35 @@
+import asyncio
+from typing import Dict, Optional
+
+# 正在处理请求的任务及其ASGI scope，供监控线程按任务反查当前路由
+_active_requests: Dict[asyncio.Task, dict] = {}
+
+class RequestContextMiddleware:
+    """记录每个请求所在的任务，路由匹配后scope中会带上route信息"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        task = asyncio.current_task()
+        _active_requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _active_requests.pop(task, None)
+
+def route_of(scope: dict) -> str:
+    """请求的路由标识，如"GET /system/user/{id}"，未匹配到路由时使用原始路径"""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+def current_route(loop: asyncio.AbstractEventLoop) -> Optional[str]:
+    """事件循环当前正在执行的请求路由，可在其他线程中调用"""
+    task = asyncio.current_task(loop)
+    scope = _active_requests.get(task) if task is not None else None
+    return route_of(scope) if scope is not None else None
@@ -1,47 +1,93 @@
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from .config import settings
 
-# 密码哈希上下文 - 使用pbkdf2_sha256代替bcrypt以避免密码长度限制和passlib库的bug
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# passlib和python-jose（含cryptography）导入较慢，延迟到首次使用时再导入以加快worker启动
+_pwd_context = None
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """创建访问令牌"""
+def get_pwd_context():
+    """获取密码哈希上下文 - 默认使用pbkdf2_sha256代替bcrypt以避免密码长度限制和passlib库的bug"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        # 除第一个方案外均标记为过时；迭代次数与配置不一致的哈希也视为需要升级
+        _pwd_context = CryptContext(
+            schemes=settings.password_schemes,
+            deprecated="auto",
+            pbkdf2_sha256__default_rounds=settings.pbkdf2_rounds,
+            pbkdf2_sha256__min_rounds=settings.pbkdf2_rounds,
+            pbkdf2_sha256__max_rounds=settings.pbkdf2_rounds,
+            bcrypt__default_rounds=settings.bcrypt_rounds,
+            bcrypt__min_rounds=settings.bcrypt_rounds,
+            bcrypt__max_rounds=settings.bcrypt_rounds,
+        )
+    return _pwd_context
+
+def preload():
+    """预先导入延迟加载的依赖，可在服务就绪后于后台线程调用"""
+    get_pwd_context()
+    from jose import jwt  # noqa: F401
+
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[dict] = None
+) -> str:
+    """创建访问令牌，claims为附加声明"""
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+    from jose import jwt
+    
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "type": "access"}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def create_refresh_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """创建刷新令牌"""
+def create_refresh_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[dict] = None
+) -> str:
+    """创建刷新令牌，claims为附加声明"""
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    from jose import jwt
+    
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "type": "refresh"}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """验证密码，无法识别的哈希或缺少对应后端时视为验证失败"""
+    try:
+        return get_pwd_context().verify(plain_password, hashed_password)
+    except (ValueError, TypeError, RuntimeError) as e:
+        print(f"密码哈希无法校验：{e}")
+        return False
+
+def password_needs_update(hashed_password: str) -> bool:
+    """哈希是否使用了过时的方案或迭代次数，需要重新哈希"""
+    try:
+        return get_pwd_context().needs_update(hashed_password)
+    except (ValueError, TypeError, RuntimeError):
+        return False
 
 def get_password_hash(password: str) -> str:
     """获取密码哈希值"""
     # bcrypt算法限制密码长度不能超过72字节
     if len(password) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def decode_jwt(token: str) -> Optional[dict]:
     """解码JWT令牌"""
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         return payload
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from utils.response import success_response
+
+T = TypeVar('T')
+
+class LeaderAbandoned(Exception):
+    """发起方放弃了执行（如客户端已断开），等待中的跟随者应重新发起，而不是共享该异常"""
+
+class SingleFlight:
+    """请求合并：并发的相同读请求共享同一次数据库查询和序列化结果"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # 按名称统计：executed实际执行次数，coalesced被合并的请求数
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, name: str, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行fn，若相同name和key的调用正在进行则等待其结果"""
+        flight_key = (name, key)
+        stats = self._stats.setdefault(name, {"executed": 0, "coalesced": 0})
+        while True:
+            future = self._inflight.get(flight_key)
+            if future is None:
+                break
+            stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 发起方被取消（如客户端断开）时，跟随者重新发起查询
+                if not future.cancelled():
+                    raise
+                stats["coalesced"] -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        stats["executed"] += 1
+        try:
+            result = await fn()
+        except (asyncio.CancelledError, LeaderAbandoned):
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 标记异常已被读取，避免无跟随者时出现未处理异常的警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[flight_key]
+
+    async def response(
+        self,
+        name: str,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        encode: Optional[Callable[[Any], bytes]] = None
+    ) -> Response:
+        """合并执行loader并只序列化一次，每个调用方获得同一份响应体；encode为自定义的响应体序列化"""
+        async def build() -> bytes:
+            data = await loader()
+            if encode is not None:
+                return encode(data)
+            return JSONResponse(content=jsonable_encoder(success_response(data=data))).body
+
+        body = await self.do(name, key, build)
+        return Response(content=body, media_type="application/json")
+
+    def stats(self) -> Dict[str, Any]:
+        """合并统计"""
+        return {
+            "inflight": len(self._inflight),
+            "routes": {name: dict(value) for name, value in self._stats.items()},
+        }
+
+# 全局请求合并实例
+singleflight = SingleFlight()
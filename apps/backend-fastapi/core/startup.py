@@ -0,0 +1,26 @@
+import time
+from typing import List, Tuple
+
+class StartupTimeline:
+    """启动时间线，记录各阶段耗时并在启动完成后输出"""
+    
+    def __init__(self):
+        # 以本模块被导入的时间作为起点，main.py应最先导入本模块
+        self.started = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+    
+    def mark(self, stage: str) -> None:
+        """记录阶段完成时间"""
+        self.marks.append((stage, time.perf_counter()))
+    
+    def report(self) -> str:
+        """生成时间线报告"""
+        lines = ["启动时间线："]
+        previous = self.started
+        for stage, at in self.marks:
+            lines.append(f"  {stage}: +{(at - previous) * 1000:8.1f}ms  累计 {(at - self.started) * 1000:8.1f}ms")
+            previous = at
+        return "\n".join(lines)
+
+# 全局启动时间线
+timeline = StartupTimeline()
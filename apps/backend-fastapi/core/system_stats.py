@@ -0,0 +1,220 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, case
+from sqlalchemy.future import select
+
+from core.cache_bus import bus, CacheEvent
+from core.config import settings
+from core.database import BulkSessionLocal
+from models.user import User
+from models.user_role import UserRole
+from models.menu import Menu
+
+# 两次全量重算之间的最短间隔（秒），避免频繁的远程变更导致反复重算
+MIN_RECOUNT_INTERVAL = 1.0
+
+class SystemStats:
+    """系统统计计数器：本worker的写操作按增量更新，其他worker的变更事件标记为待重算，并定期全量重算校正"""
+
+    def __init__(self, reconcile_interval: float):
+        self.reconcile_interval = reconcile_interval
+        self.users_total = 0
+        self.users_active = 0
+        self.users_by_dept: Counter = Counter()
+        self.users_by_role: Counter = Counter()
+        self.menus_by_type: Counter = Counter()
+        self.reconciled_at: Optional[float] = None
+        # 最近一次重算时发现的与增量计数不一致的项数
+        self.last_drift = 0
+        self.recounts = 0
+        # 重算进行中时记录的增量(计数名, 键, 增量)，重算完成后补到查询结果上
+        self._journal: Optional[List[Tuple[str, Any, int]]] = None
+        self._dirty: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- 增量更新，由写操作在事务提交后调用 ----
+
+    def user_created(self, status: bool, dept_id: Optional[int], role_ids: Iterable[int] = ()) -> None:
+        self._add_user(status, dept_id, role_ids, 1)
+
+    def users_deleted(self, rows: Iterable[Tuple[bool, Optional[int]]], role_ids: Iterable[int] = ()) -> None:
+        """rows为被删除用户的(状态, 部门ID)，role_ids为被删除的角色关联"""
+        for status, dept_id in rows:
+            self._add_user(status, dept_id, (), -1)
+        self.roles_changed(removed=role_ids)
+
+    def user_updated(
+        self,
+        old_status: bool,
+        new_status: bool,
+        old_dept_id: Optional[int],
+        new_dept_id: Optional[int]
+    ) -> None:
+        if bool(old_status) != bool(new_status):
+            self.users_status_changed(1, new_status)
+        if old_dept_id != new_dept_id:
+            self._record("users_by_dept", old_dept_id, -1)
+            self._record("users_by_dept", new_dept_id, 1)
+
+    def users_status_changed(self, count: int, status: bool) -> None:
+        """count个用户的状态变更为status"""
+        self._record("users_active", None, count if status else -count)
+
+    def roles_changed(self, added: Iterable[int] = (), removed: Iterable[int] = ()) -> None:
+        for role_id in added:
+            self._record("users_by_role", role_id, 1)
+        for role_id in removed:
+            self._record("users_by_role", role_id, -1)
+
+    def menu_created(self, menu_type: Optional[int]) -> None:
+        self._record("menus_by_type", menu_type, 1)
+
+    def menu_type_changed(self, old_type: Optional[int], new_type: Optional[int]) -> None:
+        if old_type != new_type:
+            self._record("menus_by_type", old_type, -1)
+            self._record("menus_by_type", new_type, 1)
+
+    def menus_deleted(self, menu_types: Iterable[Optional[int]]) -> None:
+        for menu_type in menu_types:
+            self._record("menus_by_type", menu_type, -1)
+
+    def mark_dirty(self) -> None:
+        """无法计算增量的变更（批量操作或其他worker的写入），等待后台重算"""
+        if self._dirty:
+            self._dirty.set()
+
+    def on_table_changed(self, event: CacheEvent) -> None:
+        """其他worker的写入无法得知增量，标记为待重算；本worker的写入已由写操作直接更新"""
+        if event.origin != bus.worker_id:
+            self.mark_dirty()
+
+    # ---- 全量重算 ----
+
+    async def reconcile(self) -> bool:
+        """全量重算并替换内存计数，返回是否已替换
+
+        重算期间本worker的增量先记录下来，查询完成后补到查询结果上，持续写入时重算也能收敛；
+        查询与增量之间的少量重叠（提交后、记录增量前被查询读到的写入）由下一次重算校正。
+        重算期间出现无法计算增量的变更时，待重算标记保持设置，稍后再次重算
+        """
+        if self._dirty:
+            self._dirty.clear()
+        self._journal = []
+        try:
+            async with BulkSessionLocal() as db:
+                result = await db.execute(
+                    select(func.count(User.id), func.sum(case((User.status == True, 1), else_=0)))
+                )
+                total, active = result.one()
+                result = await db.execute(select(User.dept_id, func.count(User.id)).group_by(User.dept_id))
+                by_dept = Counter({row[0]: row[1] for row in result.all()})
+                result = await db.execute(select(UserRole.role_id, func.count(UserRole.id)).group_by(UserRole.role_id))
+                by_role = Counter({row[0]: row[1] for row in result.all()})
+                result = await db.execute(select(Menu.type, func.count(Menu.id)).group_by(Menu.type))
+                by_type = Counter({row[0]: row[1] for row in result.all()})
+        finally:
+            journal, self._journal = self._journal, None
+
+        old = (self.users_total, self.users_active, self.users_by_dept, self.users_by_role, self.menus_by_type)
+        self.users_total = total
+        self.users_active = active or 0
+        self.users_by_dept = by_dept
+        self.users_by_role = by_role
+        self.menus_by_type = by_type
+        for attr, key, delta in journal:
+            self._apply(attr, key, delta)
+
+        old_total, old_active, old_by_dept, old_by_role, old_by_type = old
+        drift = int(old_total != self.users_total) + int(old_active != self.users_active)
+        for old_counter, new_counter in (
+            (old_by_dept, self.users_by_dept), (old_by_role, self.users_by_role), (old_by_type, self.menus_by_type)
+        ):
+            drift += sum(1 for key in set(old_counter) | set(new_counter) if old_counter.get(key, 0) != new_counter.get(key, 0))
+
+        self.last_drift = drift if self.reconciled_at is not None else 0
+        self.reconciled_at = time.time()
+        self.recounts += 1
+        return True
+
+    async def start(self) -> None:
+        """加载初始计数并启动后台校正任务"""
+        self._dirty = asyncio.Event()
+        await self.reconcile()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def stale(self) -> bool:
+        """尚未完成首次重算，或有其他worker的变更等待重算"""
+        return self.reconciled_at is None or bool(self._dirty and self._dirty.is_set())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前计数"""
+        return {
+            "users": {
+                "total": self.users_total,
+                "active": self.users_active,
+                "disabled": self.users_total - self.users_active,
+                "byDept": dict(self.users_by_dept),
+                "byRole": dict(self.users_by_role),
+            },
+            "menus": {
+                "total": sum(self.menus_by_type.values()),
+                "byType": dict(self.menus_by_type),
+            },
+            "stale": self.stale,
+            "reconciledAt": self.reconciled_at,
+            "lastDrift": self.last_drift,
+            "recounts": self.recounts,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), self.reconcile_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"系统统计重算失败：{e}")
+            await asyncio.sleep(MIN_RECOUNT_INTERVAL)
+
+    def _add_user(self, status: bool, dept_id: Optional[int], role_ids: Iterable[int], sign: int) -> None:
+        self._record("users_total", None, sign)
+        if status:
+            self._record("users_active", None, sign)
+        self._record("users_by_dept", dept_id, sign)
+        for role_id in role_ids:
+            self._record("users_by_role", role_id, sign)
+
+    def _record(self, attr: str, key: Any, delta: int) -> None:
+        """将增量作用于当前计数，重算进行中时同时记录"""
+        self._apply(attr, key, delta)
+        if self._journal is not None:
+            self._journal.append((attr, key, delta))
+
+    def _apply(self, attr: str, key: Any, delta: int) -> None:
+        value = getattr(self, attr)
+        if not isinstance(value, Counter):
+            setattr(self, attr, value + delta)
+            return
+        value[key] += delta
+        if value[key] <= 0:
+            del value[key]
+
+# 全局系统统计实例
+system_stats = SystemStats(settings.stats_reconcile_interval)
+for _table in ("sys_user", "sys_user_role", "sys_menu"):
+    bus.subscribe(_table, system_stats.on_table_changed)
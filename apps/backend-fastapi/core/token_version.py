@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from core.cache_bus import bus, CacheEvent
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.user import User
+from models.tombstone import Tombstone
+
+# 已删除用户的版本标记，任何令牌都无法匹配
+DELETED = -1
+
+class TokenVersions:
+    """用户令牌版本的内存映射：只保存版本号大于0的用户，未记录的用户版本号为0"""
+    
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def get(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+    
+    def is_valid(self, user_id: int, version: Optional[int]) -> bool:
+        """令牌中的版本号是否仍然有效"""
+        return version is not None and self.get(user_id) == version
+    
+    async def load(self) -> None:
+        """启动时加载所有版本号大于0的用户，以及访问令牌有效期内被删除（或归档）的用户
+
+        已删除用户的令牌版本号可能仍为0，与未记录用户的默认值相同；删除标记从sys_tombstone读取，
+        重启后不会丢失
+        """
+        since = datetime.now() - timedelta(minutes=settings.access_token_expire_minutes)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, User.token_version).where(User.token_version > 0)
+            )
+            versions = {row.id: row.token_version for row in result.all()}
+            tombstone_result = await db.execute(
+                select(Tombstone.row_id)
+                .where(
+                    Tombstone.table_name == "sys_user",
+                    Tombstone.deleted_at >= since,
+                    # 已恢复的归档用户不算删除
+                    ~select(User.id).where(User.id == Tombstone.row_id).exists()
+                )
+            )
+            for user_id in tombstone_result.scalars().all():
+                versions[user_id] = DELETED
+        # 保留已删除用户的标记
+        versions.update({k: v for k, v in self._versions.items() if v == DELETED})
+        self._versions = versions
+    
+    async def reload(self, user_ids: Iterable[int]) -> None:
+        """从数据库重新加载指定用户的版本号，已不存在的用户标记为已删除"""
+        ids = list(user_ids)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User.id, User.token_version).where(User.id.in_(ids)))
+            found = {row.id: row.token_version for row in result.all()}
+        for user_id in ids:
+            version = found.get(user_id, DELETED)
+            if version:
+                self._versions[user_id] = version
+            else:
+                self._versions.pop(user_id, None)
+    
+    def on_user_changed(self, event: CacheEvent) -> None:
+        """用户表变更后异步刷新受影响用户的版本号"""
+        if event.whole_table:
+            coro = self.load()
+        else:
+            coro = self.reload(int(key) for key in event.keys)
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+async def bump_token_version(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """递增用户的令牌版本号，使已签发的令牌失效；在调用方的事务中执行，提交后由缓存总线同步到各worker"""
+    await db.execute(
+        update(User)
+        .where(User.id.in_(list(user_ids)))
+        .values(token_version=User.token_version + 1)
+    )
+
+# 全局令牌版本映射
+token_versions = TokenVersions()
+bus.subscribe("sys_user", token_versions.on_user_changed)
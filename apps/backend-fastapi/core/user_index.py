@@ -0,0 +1,317 @@
+import asyncio
+import time
+from array import array
+from bisect import bisect_left, insort
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.future import select
+
+from core.cache_bus import bus, CacheEvent
+from core.config import settings
+from core.database import BulkSessionLocal
+from models.user import User
+
+# 参与前缀匹配的字段
+INDEXED_FIELDS = ("username", "nickname", "name")
+
+def index_keys(values: Iterable[Optional[str]]) -> List[bytes]:
+    """字段值转为索引键：小写后的UTF-8编码，UTF-8字节序与码点顺序一致，字节串前缀即字符前缀"""
+    keys = {value.strip().lower().encode("utf-8") for value in values if value and value.strip()}
+    return sorted(keys)
+
+class UserPrefixIndex:
+    """用户名、昵称、姓名的内存前缀索引
+
+    主体为按键排序的紧凑数组：所有键拼接为一个bytes，offsets记录每个键的起始位置，ids记录对应的用户ID，
+    每个键只占键长加12字节，查询时在offsets上二分查找。写入不修改主体：新增或变更的键放入有序的增量列表，
+    被删除或变更用户在主体中的旧键通过removed屏蔽；增量超过阈值后在线程中合并生成新的主体
+    """
+
+    def __init__(self, enabled: bool, compact_threshold: int):
+        self.enabled = enabled
+        self.compact_threshold = compact_threshold
+        self.ready = False
+        self._blob = b""
+        self._offsets = array("I", [0])
+        self._ids = array("q")
+        # 增量：有序的(键, 用户ID)，以及每个用户当前的增量键和写入代数
+        self._delta: List[Tuple[bytes, int]] = []
+        self._delta_keys: Dict[int, Tuple[List[bytes], int]] = {}
+        # 主体中需要屏蔽的用户ID及屏蔽时的代数
+        self._removed: Dict[int, int] = {}
+        self._generation = 0
+        self._loading: Optional[asyncio.Task] = None
+        self._compacting: Optional[asyncio.Task] = None
+        self._pending: Set[int] = set()
+        self._refreshing: Optional[asyncio.Task] = None
+        self._reload_requested = False
+        self.compactions = 0
+        self.last_build_seconds: Optional[float] = None
+
+    # ---- 查询 ----
+
+    def search(self, prefix: str, limit: int) -> List[int]:
+        """按键排序返回前缀匹配的用户ID，同一用户只出现一次"""
+        needle = prefix.strip().lower().encode("utf-8")
+        if not needle:
+            return []
+        base = self._scan_base(needle, limit)
+        delta = self._scan_delta(needle, limit)
+        result: List[int] = []
+        seen: Set[int] = set()
+        for _, user_id in sorted(base + delta):
+            if user_id not in seen:
+                seen.add(user_id)
+                result.append(user_id)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def _scan_base(self, needle: bytes, limit: int) -> List[Tuple[bytes, int]]:
+        blob, offsets, ids, removed = self._blob, self._offsets, self._ids, self._removed
+        lo, hi = 0, len(ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if blob[offsets[mid]:offsets[mid + 1]] < needle:
+                lo = mid + 1
+            else:
+                hi = mid
+        matches: List[Tuple[bytes, int]] = []
+        seen: Set[int] = set()
+        for i in range(lo, len(ids)):
+            key = blob[offsets[i]:offsets[i + 1]]
+            if not key.startswith(needle):
+                break
+            user_id = ids[i]
+            if user_id in removed or user_id in seen:
+                continue
+            seen.add(user_id)
+            matches.append((key, user_id))
+            if len(seen) >= limit:
+                break
+        return matches
+
+    def _scan_delta(self, needle: bytes, limit: int) -> List[Tuple[bytes, int]]:
+        matches: List[Tuple[bytes, int]] = []
+        seen: Set[int] = set()
+        for i in range(bisect_left(self._delta, (needle, -1)), len(self._delta)):
+            key, user_id = self._delta[i]
+            if not key.startswith(needle):
+                break
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            matches.append((key, user_id))
+            if len(seen) >= limit:
+                break
+        return matches
+
+    # ---- 增量更新 ----
+
+    def upsert(self, user_id: int, values: Sequence[Optional[str]]) -> None:
+        """新增或更新用户的索引键"""
+        if not self.enabled:
+            return
+        self._generation += 1
+        self._removed[user_id] = self._generation
+        self._drop_delta(user_id)
+        keys = index_keys(values)
+        for key in keys:
+            insort(self._delta, (key, user_id))
+        self._delta_keys[user_id] = (keys, self._generation)
+        self._maybe_compact()
+
+    def remove(self, user_ids: Iterable[int]) -> None:
+        """移除用户的索引键"""
+        if not self.enabled:
+            return
+        for user_id in user_ids:
+            self._generation += 1
+            self._removed[user_id] = self._generation
+            self._drop_delta(user_id)
+            self._delta_keys.pop(user_id, None)
+        self._maybe_compact()
+
+    def _drop_delta(self, user_id: int) -> None:
+        entry = self._delta_keys.get(user_id)
+        if entry is None:
+            return
+        for key in entry[0]:
+            i = bisect_left(self._delta, (key, user_id))
+            if i < len(self._delta) and self._delta[i] == (key, user_id):
+                del self._delta[i]
+
+    def on_table_changed(self, event: CacheEvent) -> None:
+        """其他worker的用户变更：整表变更重建索引，否则从数据库重新读取这些用户"""
+        if not self.enabled or event.origin == bus.worker_id:
+            return
+        if event.whole_table:
+            self._reload_requested = True
+        else:
+            self._pending.update(int(key) for key in event.keys)
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh_pending())
+
+    async def refresh(self, user_ids: Iterable[int]) -> None:
+        """从数据库重新读取指定用户的索引键，已不存在的用户从索引中移除"""
+        ids = list(user_ids)
+        if not ids or not self.enabled:
+            return
+        async with BulkSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, *(getattr(User, field) for field in INDEXED_FIELDS)).where(User.id.in_(ids))
+            )
+            rows = result.all()
+        found = set()
+        for row in rows:
+            found.add(row[0])
+            self.upsert(row[0], row[1:])
+        self.remove(user_id for user_id in ids if user_id not in found)
+
+    async def _refresh_pending(self) -> None:
+        try:
+            while self._pending or self._reload_requested:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._pending.clear()
+                    await self.load()
+                    continue
+                ids, self._pending = list(self._pending), set()
+                await self.refresh(ids)
+        except Exception as e:
+            print(f"用户前缀索引更新失败：{e}")
+
+    # ---- 构建与合并 ----
+
+    def start(self) -> None:
+        """后台构建索引，构建完成前查询回退到数据库"""
+        if self.enabled:
+            self._loading = asyncio.ensure_future(self._initial_load())
+
+    async def stop(self) -> None:
+        for task in (self._loading, self._refreshing, self._compacting):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def _initial_load(self) -> None:
+        try:
+            await self.load()
+            print(f"用户前缀索引构建完成：{len(self._ids)}个键，耗时{self.last_build_seconds}秒")
+        except Exception as e:
+            print(f"用户前缀索引构建失败：{e}")
+
+    async def load(self, session_factory=None) -> None:
+        """从数据库全量构建索引，默认使用bulk连接池"""
+        started = time.perf_counter()
+        generation = self._generation
+        keys: List[bytes] = []
+        ids = array("q")
+        async with (session_factory or BulkSessionLocal)() as db:
+            result = await db.stream(
+                select(User.id, *(getattr(User, field) for field in INDEXED_FIELDS)).execution_options(yield_per=10000)
+            )
+            async for partition in result.partitions():
+                for row in partition:
+                    for key in index_keys(row[1:]):
+                        keys.append(key)
+                        ids.append(row[0])
+        blob, offsets, sorted_ids = await asyncio.to_thread(build_sorted, keys, ids)
+        del keys
+        self._swap(blob, offsets, sorted_ids, generation)
+        self.ready = True
+        self.last_build_seconds = round(time.perf_counter() - started, 3)
+
+    def _maybe_compact(self) -> None:
+        if len(self._delta) + len(self._removed) < self.compact_threshold:
+            return
+        if self._compacting is None or self._compacting.done():
+            self._compacting = asyncio.ensure_future(self._compact())
+
+    async def _compact(self) -> None:
+        """把增量合并进主体：快照当前增量在线程中合并，合并期间的新写入保留在增量中"""
+        generation = self._generation
+        base = self._blob
+        delta = list(self._delta)
+        removed = frozenset(self._removed)
+        try:
+            blob, offsets, ids = await asyncio.to_thread(
+                merge_sorted, base, self._offsets, self._ids, delta, removed
+            )
+        except Exception as e:
+            print(f"用户前缀索引合并失败：{e}")
+            return
+        if self._blob is not base:
+            # 合并期间索引已被全量重建
+            return
+        self._swap(blob, offsets, ids, generation)
+        self.compactions += 1
+
+    def _swap(self, blob: bytes, offsets: array, ids: array, generation: int) -> None:
+        """替换主体，丢弃已包含在新主体中的增量和屏蔽（代数不大于generation的部分）"""
+        self._blob, self._offsets, self._ids = blob, offsets, ids
+        self._removed = {user_id: gen for user_id, gen in self._removed.items() if gen > generation}
+        self._delta_keys = {user_id: entry for user_id, entry in self._delta_keys.items() if entry[1] > generation}
+        self._delta = [entry for entry in self._delta if entry[1] in self._delta_keys]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "keys": len(self._ids),
+            "deltaKeys": len(self._delta),
+            "removed": len(self._removed),
+            "bytes": len(self._blob) + self._offsets.itemsize * len(self._offsets) + self._ids.itemsize * len(self._ids),
+            "compactions": self.compactions,
+            "lastBuildSeconds": self.last_build_seconds,
+        }
+
+def build_sorted(keys: List[bytes], ids: array) -> Tuple[bytes, array, array]:
+    """按(键, 用户ID)排序生成紧凑数组"""
+    order = sorted(range(len(keys)), key=lambda i: (keys[i], ids[i]))
+    blob = b"".join(keys[i] for i in order)
+    offsets = array("I", [0])
+    offsets.extend(accumulate(len(keys[i]) for i in order))
+    return blob, offsets, array("q", (ids[i] for i in order))
+
+def merge_sorted(
+    blob: bytes,
+    offsets: array,
+    ids: array,
+    delta: List[Tuple[bytes, int]],
+    removed: frozenset
+) -> Tuple[bytes, array, array]:
+    """归并主体与有序增量，跳过被屏蔽用户在主体中的键"""
+    parts: List[bytes] = []
+    new_offsets = array("I", [0])
+    new_ids = array("q")
+    position = 0
+    j = 0
+
+    def append(key: bytes, user_id: int) -> None:
+        nonlocal position
+        parts.append(key)
+        position += len(key)
+        new_offsets.append(position)
+        new_ids.append(user_id)
+
+    for i in range(len(ids)):
+        user_id = ids[i]
+        if user_id in removed:
+            continue
+        key = blob[offsets[i]:offsets[i + 1]]
+        while j < len(delta) and delta[j] < (key, user_id):
+            append(*delta[j])
+            j += 1
+        append(key, user_id)
+    while j < len(delta):
+        append(*delta[j])
+        j += 1
+    return b"".join(parts), new_offsets, new_ids
+
+# 全局用户前缀索引
+user_index = UserPrefixIndex(settings.user_index_enabled, settings.user_index_compact_threshold)
+bus.subscribe("sys_user", user_index.on_table_changed)
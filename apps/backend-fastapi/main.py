@@ -1,11 +1,26 @@
+from core.startup import timeline
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-import uvicorn
+import asyncio
 
 from core.config import settings
-from core.database import init_db
+from core.database import init_db, warm_pool, dispose_engines
+from core.cache_bus import bus
+from core.audit import audit
+from core.token_version import token_versions
+from core.system_stats import system_stats
+from core.archive import user_archiver
+from core.events import change_broadcaster
+from core.jobs import job_manager
+from core.user_index import user_index
+from core.change_log import change_log
+from core.health import loop_lag, readiness
+from core.blocking import blocking_detector
+from core.request_context import RequestContextMiddleware
+from core.memprofile import MemoryProfileMiddleware
+from core.admission import AdmissionMiddleware
 from api import api_router
 from schemas.base import ResponseBase
 
@@ -16,18 +31,69 @@ async def lifespan(app: FastAPI):
     print("初始化数据库...")
     await init_db()
     print("数据库初始化完成")
+    timeline.mark("数据库就绪")
     
     # 初始化数据
     from utils.init_data import init_all_data
     from core.database import AsyncSessionLocal
     
-    # 获取数据库会话并初始化数据
-    async with AsyncSessionLocal() as db:
-        await init_all_data(db)
+    async def seed():
+        # 获取数据库会话并初始化数据
+        async with AsyncSessionLocal() as db:
+            await init_all_data(db)
+        timeline.mark("初始数据完成")
+    
+    # 初始化数据与连接池预热并行进行
+    await asyncio.gather(seed(), warm_pool())
+    timeline.mark("连接池预热")
+    
+    # 启动事件循环延迟监测
+    loop_lag.start()
+    if settings.blocking_detector_enabled:
+        blocking_detector.start()
+    
+    # 加载令牌版本号
+    await token_versions.load()
+    # 加载系统统计计数
+    await system_stats.start()
+    # 创建增量同步序列并启动删除记录清理
+    await change_log.start()
+    
+    # 启动缓存失效总线
+    await bus.start()
+    # 启动审计日志后台写入
+    audit.start()
+    # 启动变更推送心跳
+    change_broadcaster.start()
+    # 启动后台任务worker
+    await job_manager.start()
+    # 后台构建用户前缀索引
+    user_index.start()
+    # 启动禁用用户归档任务
+    if settings.archive_enabled:
+        user_archiver.start()
+    timeline.mark("服务就绪")
+    print(timeline.report())
+    
+    # 就绪后在后台线程预先导入延迟加载的依赖，避免首个登录请求承担导入开销
+    from core.security import preload
+    asyncio.get_running_loop().run_in_executor(None, preload)
     
     yield
     
-    # 关闭时执行
+    # 关闭时执行：先结束推送连接，避免长连接阻塞关闭
+    await change_broadcaster.stop()
+    await user_archiver.stop()
+    await job_manager.stop()
+    await user_index.stop()
+    await change_log.stop()
+    await audit.stop()
+    await system_stats.stop()
+    await bus.stop()
+    await loop_lag.stop()
+    await blocking_detector.stop()
+    # 后台任务都已停止，最后关闭连接池
+    await dispose_engines()
     print("应用关闭")
 
 # 创建FastAPI应用
@@ -39,6 +105,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# 准入控制（位于CORS之内，503响应同样带CORS头）
+app.add_middleware(AdmissionMiddleware)
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -48,6 +117,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 记录请求所在任务，供监控线程定位当前路由
+app.add_middleware(RequestContextMiddleware)
+
+# 按路由的内存采样（仅在采样期间生效）
+app.add_middleware(MemoryProfileMiddleware)
+
 # 全局异常处理
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -73,10 +148,31 @@ async def health_check():
         }
     )
 
+# 就绪检查（供负载均衡器探测，未就绪时返回503）
+@app.get("/ready", response_model=ResponseBase[dict])
+async def readiness_check():
+    """就绪检查：数据库延迟、连接池占用率和事件循环延迟"""
+    report = await readiness()
+    if report["ready"]:
+        return ResponseBase(data=report)
+    return JSONResponse(
+        status_code=503,
+        content=ResponseBase(
+            code=503,
+            data=report,
+            error=", ".join(report["reasons"]),
+            message="Service Not Ready"
+        ).model_dump()
+    )
+
 # 注册API路由
 app.include_router(api_router, prefix="")
 
+timeline.mark("模块导入")
+
 if __name__ == "__main__":
+    import uvicorn
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
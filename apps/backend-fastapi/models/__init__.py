@@ -3,5 +3,11 @@ from .role import Role
 from .menu import Menu
 from .dept import Dept
 from .user_role import UserRole
+from .cache_event import CacheEventLog
+from .audit_log import AuditLog
+from .user_archive import UserArchive
+from .job import Job
+from .change_sequence import ChangeSequence
+from .tombstone import Tombstone
 
-__all__ = ["User", "Role", "Menu", "Dept", "UserRole"]
+__all__ = ["User", "Role", "Menu", "Dept", "UserRole", "CacheEventLog", "AuditLog", "UserArchive", "Job", "ChangeSequence", "Tombstone"]
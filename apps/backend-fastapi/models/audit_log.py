@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from core.database import Base
+
+class AuditLog(Base):
+    """操作审计日志模型"""
+    __tablename__ = "sys_audit_log"
+    
+    id = Column(Integer, primary_key=True, index=True, comment="日志ID")
+    user_id = Column(Integer, index=True, comment="操作人ID")
+    username = Column(String(50), comment="操作人用户名")
+    action = Column(String(50), index=True, nullable=False, comment="操作类型，如user.create")
+    target_type = Column(String(50), comment="操作对象类型")
+    target_ids = Column(Text, comment="操作对象ID，逗号分隔")
+    detail = Column(Text, comment="操作详情（JSON）")
+    created_at = Column(DateTime(timezone=True), index=True, nullable=False, comment="操作时间")
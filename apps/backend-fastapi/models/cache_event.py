@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, Text, Float
+from core.database import Base
+
+class CacheEventLog(Base):
+    """缓存失效事件模型（供多worker轮询）"""
+    __tablename__ = "sys_cache_event"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="事件版本号")
+    table_name = Column(String(50), nullable=False, comment="变更的表名")
+    row_keys = Column(Text, comment="变更的主键，逗号分隔，为空表示整表")
+    origin = Column(String(100), nullable=False, comment="发布事件的worker标识")
+    created_ts = Column(Float, nullable=False, index=True, comment="发布时间戳（秒）")
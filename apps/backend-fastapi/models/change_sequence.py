@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, BigInteger
+from core.database import Base
+
+class ChangeSequence(Base):
+    """变更版本号序列（每个增量同步的表一行）"""
+    __tablename__ = "sys_change_seq"
+    
+    table_name = Column(String(50), primary_key=True, comment="表名")
+    version = Column(BigInteger, default=0, server_default="0", nullable=False, comment="已分配的最大变更版本号")
+    pruned_version = Column(BigInteger, default=0, server_default="0", nullable=False, comment="已清理的删除记录的最大版本号，早于该版本的同步需全量重新同步")
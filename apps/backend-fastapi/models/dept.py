@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -17,3 +17,4 @@ class Dept(Base):
     status = Column(Boolean, default=True, comment="状态：0禁用，1启用")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), comment="更新时间")
+    change_version = Column(BigInteger, default=0, server_default="0", nullable=False, index=True, comment="变更版本号，每次修改时从sys_change_seq分配，用于增量同步")
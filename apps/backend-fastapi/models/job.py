@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from core.database import Base
+
+class Job(Base):
+    """后台任务模型"""
+    __tablename__ = "sys_job"
+    
+    id = Column(Integer, primary_key=True, index=True, comment="任务ID")
+    kind = Column(String(50), nullable=False, comment="任务类型，如user.delete")
+    status = Column(String(20), index=True, nullable=False, comment="状态：pending等待，running执行中，succeeded成功，failed失败，cancelled已取消")
+    params = Column(Text, comment="任务参数（JSON）")
+    total = Column(Integer, default=0, comment="总数")
+    done = Column(Integer, default=0, comment="已完成数")
+    result = Column(Text, comment="执行结果（JSON）")
+    error = Column(Text, comment="失败原因")
+    cancel_requested = Column(Boolean, default=False, nullable=False, comment="是否已请求取消")
+    owner = Column(String(100), comment="执行任务的worker")
+    created_by = Column(Integer, comment="创建人ID")
+    created_at = Column(DateTime(timezone=True), nullable=False, comment="创建时间")
+    started_at = Column(DateTime(timezone=True), comment="开始时间")
+    finished_at = Column(DateTime(timezone=True), comment="结束时间")
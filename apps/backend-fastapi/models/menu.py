@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Integer
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Integer, BigInteger
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -21,3 +21,4 @@ class Menu(Base):
     is_visible = Column(Boolean, default=True, comment="是否可见")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), comment="更新时间")
+    change_version = Column(BigInteger, default=0, server_default="0", nullable=False, index=True, comment="变更版本号，每次修改时从sys_change_seq分配，用于增量同步")
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Index
+from core.database import Base
+
+class Tombstone(Base):
+    """删除记录模型（供增量同步获取已删除的行）"""
+    __tablename__ = "sys_tombstone"
+    __table_args__ = (
+        Index("ix_sys_tombstone_table_version", "table_name", "version"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="ID")
+    table_name = Column(String(50), nullable=False, comment="表名")
+    row_id = Column(Integer, nullable=False, comment="被删除行的主键")
+    version = Column(BigInteger, nullable=False, comment="删除时分配的变更版本号")
+    deleted_at = Column(DateTime(timezone=True), index=True, nullable=False, comment="删除时间")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from core.database import Base
@@ -18,8 +18,11 @@ class User(Base):
     dept_id = Column(Integer, ForeignKey("sys_dept.id"), nullable=True, comment="部门ID")
     status = Column(Boolean, default=True, comment="状态：0禁用，1启用")
     is_superuser = Column(Boolean, default=False, comment="是否为超级管理员")
+    disabled_at = Column(DateTime(timezone=True), index=True, nullable=True, comment="禁用时间，用于归档长期禁用的用户")
+    token_version = Column(Integer, default=0, server_default="0", nullable=False, comment="令牌版本号，递增后已签发的令牌失效")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), comment="更新时间")
+    change_version = Column(BigInteger, default=0, server_default="0", nullable=False, index=True, comment="变更版本号，每次修改时从sys_change_seq分配，用于增量同步")
     
     # 关联关系
     roles = relationship("Role", secondary="sys_user_role", back_populates="users")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from core.database import Base
+
+class UserArchive(Base):
+    """归档用户模型：长期禁用的用户从sys_user移入此表，恢复时移回"""
+    __tablename__ = "sys_user_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False, comment="用户ID，沿用原用户ID")
+    username = Column(String(50), unique=True, index=True, nullable=False, comment="用户名")
+    password = Column(String(255), nullable=False, comment="密码")
+    nickname = Column(String(50), comment="昵称")
+    name = Column(String(50), comment="姓名")
+    avatar = Column(String(255), comment="头像")
+    email = Column(String(100), comment="邮箱")
+    phone = Column(String(20), comment="手机号")
+    dept_id = Column(Integer, comment="部门ID")
+    is_superuser = Column(Boolean, default=False, comment="是否为超级管理员")
+    token_version = Column(Integer, default=0, nullable=False, comment="令牌版本号")
+    role_ids = Column(Text, comment="归档时的角色ID，逗号分隔")
+    created_at = Column(DateTime(timezone=True), comment="创建时间")
+    disabled_at = Column(DateTime(timezone=True), comment="禁用时间")
+    archived_at = Column(DateTime(timezone=True), index=True, nullable=False, comment="归档时间")
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
 from core.database import Base
 
 class UserRole(Base):
     """用户角色关联模型"""
     __tablename__ = "sys_user_role"
+    __table_args__ = (
+        UniqueConstraint("user_id", "role_id", name="uq_sys_user_role_user_role"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, comment="ID")
     user_id = Column(Integer, ForeignKey("sys_user.id"), nullable=False, comment="用户ID")
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 
@@ -48,3 +48,9 @@ class UserInfoResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class BootstrapResponse(BaseModel):
+    """前端启动数据响应模型（用户信息、权限码、菜单树）"""
+    userInfo: UserInfoResponse
+    accessCodes: List[str] = []
+    menus: List[Dict[str, Any]] = []
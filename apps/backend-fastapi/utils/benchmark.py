@@ -0,0 +1,431 @@
+import argparse
+import asyncio
+import os
+import time
+from statistics import mean, median
+from typing import Callable, Dict, List
+
+def measure(fn: Callable[[], object], repeat: int) -> List[float]:
+    """执行fn若干次，返回每次耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def bench_password(args):
+    """登录时的密码校验耗时与迭代次数的关系"""
+    from passlib.hash import pbkdf2_sha256, bcrypt
+    
+    print(f"{'方案':<16}{'迭代次数':>10}{'平均(ms)':>12}{'中位数(ms)':>12}{'最大(ms)':>12}")
+    for rounds in args.rounds:
+        hashed = pbkdf2_sha256.using(rounds=rounds).hash(args.password)
+        timings = measure(lambda: pbkdf2_sha256.verify(args.password, hashed), args.repeat)
+        print(f"{'pbkdf2_sha256':<16}{rounds:>10}{mean(timings):>12.2f}{median(timings):>12.2f}{max(timings):>12.2f}")
+    for rounds in args.bcrypt_rounds:
+        hashed = bcrypt.using(rounds=rounds).hash(args.password)
+        timings = measure(lambda: bcrypt.verify(args.password, hashed), args.repeat)
+        print(f"{'bcrypt':<16}{rounds:>10}{mean(timings):>12.2f}{median(timings):>12.2f}{max(timings):>12.2f}")
+
+async def measure_async(fn, repeat: int) -> List[float]:
+    """执行协程函数fn若干次，返回每次耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+async def create_test_database(url: str, users: int, disabled: float = 0.0, session_class=None):
+    """清空并重建测试数据库，生成users个用户，其中disabled比例的用户禁用于一年前；返回(引擎, 会话工厂)"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from core.database import Base, create_engine, session_class as default_session_class
+    from models import User, Role, Dept, UserRole
+    
+    engine = create_engine(url)
+    session_factory = async_sessionmaker(
+        engine,
+        class_=session_class or default_session_class(url),
+        expire_on_commit=False,
+        autoflush=False
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    
+    old = datetime.now() - timedelta(days=365)
+    async with session_factory() as db:
+        await db.execute(insert(Dept), [{"id": i, "name": f"部门{i}"} for i in range(1, 11)])
+        await db.execute(insert(Role), [{"id": i, "name": f"角色{i}", "code": f"role{i}"} for i in range(1, 6)])
+        for start in range(1, users + 1, 5000):
+            ids = range(start, min(start + 5000, users + 1))
+            rows = []
+            for i in ids:
+                is_disabled = i % 100 < disabled * 100
+                rows.append({
+                    "id": i, "username": f"user{i}", "password": "x", "nickname": f"用户{i}",
+                    "dept_id": i % 10 + 1, "status": not is_disabled, "disabled_at": old if is_disabled else None,
+                })
+            await db.execute(insert(User), rows)
+            await db.execute(insert(UserRole), [{"user_id": i, "role_id": i % 5 + 1} for i in ids])
+        await db.commit()
+    
+    return engine, session_factory
+
+async def run_archive_benchmark(args):
+    from datetime import datetime, timedelta
+    from sqlalchemy import func
+    from sqlalchemy.future import select
+    from core.archive import archive_batch
+    from models import User
+    
+    engine, session_factory = await create_test_database(args.database_url, args.users, args.disabled)
+    
+    async def report(label):
+        async with session_factory() as db:
+            async def count():
+                await db.execute(select(func.count(User.id)))
+            async def page():
+                await db.execute(select(User).order_by(User.id.desc()).offset(args.offset).limit(20))
+            async def search():
+                query = select(User).where(User.nickname.like("%用户1%"))
+                await db.execute(select(func.count()).select_from(query.subquery()))
+            async def lookup():
+                await db.execute(select(User).where(User.username == f"user{args.users}"))
+            
+            total = (await db.execute(select(func.count(User.id)))).scalar()
+            print(f"{label}：sys_user共{total}行")
+            for name, fn in (("count", count), ("page", page), ("search", search), ("lookup", lookup)):
+                timings = await measure_async(fn, args.repeat)
+                print(f"  {name:<8}{mean(timings):>10.2f}{median(timings):>10.2f}{max(timings):>10.2f}")
+    
+    print(f"{'':<10}{'平均(ms)':>10}{'中位数(ms)':>10}{'最大(ms)':>10}")
+    await report("归档前")
+    
+    started = time.perf_counter()
+    archived = 0
+    while True:
+        async with session_factory() as db:
+            ids, _, _ = await archive_batch(db, datetime.now() - timedelta(days=90), args.batch)
+            await db.commit()
+        archived += len(ids)
+        if len(ids) < args.batch:
+            break
+    print(f"归档{archived}个用户，耗时{(time.perf_counter() - started):.2f}秒")
+    
+    await report("归档后")
+    await engine.dispose()
+
+def bench_archive(args):
+    """归档禁用用户前后的列表、计数和用户名查询耗时（使用独立的测试数据库）"""
+    asyncio.run(run_archive_benchmark(args))
+
+async def run_throughput_benchmark(args):
+    import random
+    from sqlalchemy import func, update
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.future import select
+    from core.database import SerializedWriteSession
+    from models import User
+    
+    session_class = None
+    if args.database_url.startswith("sqlite"):
+        session_class = SerializedWriteSession if args.serialize else AsyncSession
+    engine, session_factory = await create_test_database(args.database_url, args.users, session_class=session_class)
+    
+    latencies = {"read": [], "write": []}
+    errors: Dict[str, int] = {}
+    
+    async def read():
+        async with session_factory() as db:
+            await db.execute(select(func.count(User.id)))
+            offset = random.randrange(0, max(args.users - 20, 1))
+            await db.execute(select(User).order_by(User.id.desc()).offset(offset).limit(20))
+    
+    async def write():
+        async with session_factory() as db:
+            user_id = random.randint(1, args.users)
+            await db.execute(update(User).where(User.id == user_id).values(nickname=f"用户{random.random()}"))
+            await db.commit()
+    
+    deadline = time.perf_counter() + args.seconds
+    
+    async def worker():
+        while time.perf_counter() < deadline:
+            kind = "write" if random.random() < args.write_ratio else "read"
+            started = time.perf_counter()
+            try:
+                await (write() if kind == "write" else read())
+                latencies[kind].append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                name = f"{kind}: {type(e).__name__}: {str(e).splitlines()[0][:60]}"
+                errors[name] = errors.get(name, 0) + 1
+    
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    await engine.dispose()
+    
+    total = sum(len(items) for items in latencies.values())
+    print(f"{args.database_url}  并发{args.concurrency}  写比例{args.write_ratio}  {args.seconds}秒")
+    print(f"  吞吐量 {total / args.seconds:.1f} 次/秒")
+    for kind, items in latencies.items():
+        if items:
+            items.sort()
+            p99 = items[min(int(len(items) * 0.99), len(items) - 1)]
+            print(f"  {kind:<6}{len(items) / args.seconds:>10.1f}次/秒  中位数{median(items):>8.2f}ms  P99{p99:>8.2f}ms")
+    for name, count in errors.items():
+        print(f"  错误 {name} x{count}")
+
+def bench_throughput(args):
+    """混合读写吞吐量，可对SQLite和MySQL分别运行以比较（使用独立的测试数据库）"""
+    asyncio.run(run_throughput_benchmark(args))
+
+async def run_suggest_benchmark(args):
+    import random
+    import tracemalloc
+    from sqlalchemy import or_
+    from sqlalchemy.future import select
+    from core.user_index import UserPrefixIndex
+    from models import User
+    
+    engine, session_factory = await create_test_database(args.database_url, args.users)
+    
+    index = UserPrefixIndex(True, args.compact_threshold)
+    tracemalloc.start()
+    started = time.perf_counter()
+    await index.load(session_factory)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = index.stats()
+    print(f"{args.users}个用户，{stats['keys']}个键，构建耗时{elapsed:.2f}秒")
+    print(f"  索引占用{stats['bytes'] / 1024 / 1024:.1f}MB（常驻{current / 1024 / 1024:.1f}MB，构建峰值{peak / 1024 / 1024:.1f}MB）")
+    
+    prefixes = [f"user{random.randint(1, args.users)}"[:random.randint(5, 8)] for _ in range(args.repeat)]
+    prefixes += [f"用户{random.randint(1, args.users)}"[:random.randint(3, 6)] for _ in range(args.repeat)]
+    
+    async with session_factory() as db:
+        async def by_index():
+            ids = index.search(random.choice(prefixes), 10)
+            await db.execute(select(User).where(User.id.in_(ids)))
+        async def by_prefix_like():
+            pattern = f"{random.choice(prefixes)}%"
+            await db.execute(select(User).where(or_(User.username.like(pattern), User.nickname.like(pattern))).order_by(User.username).limit(10))
+        async def by_contains_like():
+            pattern = f"%{random.choice(prefixes)}%"
+            await db.execute(select(User).where(or_(User.username.like(pattern), User.nickname.like(pattern))).limit(10))
+        
+        print(f"{'':<16}{'平均(ms)':>10}{'中位数(ms)':>10}{'最大(ms)':>10}")
+        for name, fn in (("index", by_index), ("LIKE 'x%'", by_prefix_like), ("LIKE '%x%'", by_contains_like)):
+            timings = await measure_async(fn, args.repeat)
+            print(f"  {name:<14}{mean(timings):>10.2f}{median(timings):>10.2f}{max(timings):>10.2f}")
+    
+    timings = measure(lambda: index.upsert(random.randint(1, args.users), (f"user{random.random()}", "昵称", None)), args.repeat)
+    print(f"  {'upsert':<14}{mean(timings):>10.3f}{median(timings):>10.3f}{max(timings):>10.3f}")
+    await engine.dispose()
+
+def bench_suggest(args):
+    """用户联想：内存前缀索引与数据库LIKE查询的耗时，以及索引的内存占用（使用独立的测试数据库）"""
+    asyncio.run(run_suggest_benchmark(args))
+
+async def run_columnar_benchmark(args):
+    import gzip
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy.future import select
+    from sqlalchemy.orm import selectinload
+    from api.system import load_user_columns, user_list_filters
+    from models import User, Dept
+    from utils.columnar import encode_columnar
+    from utils.response import success_response
+    
+    engine, session_factory = await create_test_database(args.database_url, args.users)
+    filters = user_list_filters(None, None, None, None, None, None, None, None)
+    
+    async with session_factory() as db:
+        dept_result = await db.execute(select(Dept.id, Dept.name))
+        dept_names = dict(dept_result.all())
+        
+        async def build_dicts(limit):
+            # 与用户列表的字典格式一致：ORM对象预加载角色，逐行构建字典
+            result = await db.execute(
+                select(User).options(selectinload(User.roles)).order_by(User.id.desc()).limit(limit)
+            )
+            return [{
+                "id": user.id,
+                "username": user.username,
+                "nickname": user.nickname,
+                "name": user.name,
+                "email": user.email,
+                "phone": user.phone,
+                "avatar": user.avatar,
+                "dept_id": user.dept_id,
+                "deptName": dept_names.get(user.dept_id),
+                "roles": [{"id": role.id, "name": role.name, "code": role.code} for role in user.roles],
+                "status": user.status,
+                "is_superuser": user.is_superuser,
+                "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "updated_at": user.updated_at.strftime("%Y-%m-%d %H:%M:%S") if user.updated_at else None
+            } for user in result.scalars().all()]
+        
+        def encode_dicts(items):
+            return JSONResponse(content=jsonable_encoder(success_response(data={"items": items}))).body
+        
+        print(f"{'行数':>6}{'格式':>8}{'大小(B)':>10}{'gzip(B)':>10}{'序列化(ms)':>12}{'查询+序列化(ms)':>18}")
+        for limit in args.rows:
+            items = await build_dicts(limit)
+            data = await load_user_columns(db, filters, 0, limit)
+            for name, value, encode, build in (
+                ("dict", items, encode_dicts, lambda: build_dicts(limit)),
+                ("columns", data, encode_columnar, lambda: load_user_columns(db, filters, 0, limit)),
+            ):
+                body = encode(value)
+                encode_timings = measure(lambda: encode(value), args.repeat)
+                
+                async def end_to_end():
+                    encode(await build())
+                total_timings = await measure_async(end_to_end, args.repeat)
+                print(f"{limit:>6}{name:>10}{len(body):>10}{len(gzip.compress(body)):>10}"
+                      f"{median(encode_timings):>12.2f}{median(total_timings):>18.2f}")
+    await engine.dispose()
+
+def bench_columnar(args):
+    """用户列表字典格式与列式格式的响应大小和序列化耗时（使用独立的测试数据库）"""
+    asyncio.run(run_columnar_benchmark(args))
+
+async def run_bus_worker(index: int, args, barrier, results) -> None:
+    """单个worker进程：启动总线，与其他进程同时开始发布事件，记录收到其他进程事件的主键和传播延迟"""
+    from core.cache_bus import bus
+    
+    latencies = []
+    received = set()
+    def on_event(event):
+        if event.origin != bus.worker_id:
+            latencies.append((time.time() - event.created_at) * 1000)
+            received.update(int(key) for key in event.keys)
+    bus.subscribe("*", on_event)
+    
+    await bus.start()
+    await asyncio.to_thread(barrier.wait)
+    # 各进程错开发布，事件均匀分布在轮询间隔内
+    await asyncio.sleep(args.interval * index / args.workers)
+    for i in range(args.events):
+        await bus.publish("sys_user", keys=[index * args.events + i])
+        await asyncio.sleep(args.interval)
+    
+    expected = args.events * (args.workers - 1)
+    deadline = time.monotonic() + args.poll_interval * 4 + 5
+    while len(received) < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    await bus.stop()
+    from core.database import dispose_engines
+    await dispose_engines()
+    results.put((index, latencies, received))
+
+def bus_worker(url: str, index: int, args, barrier, results) -> None:
+    # 配置在导入core之前通过环境变量设置
+    os.environ["DATABASE_URL"] = url
+    os.environ["CACHE_BUS_BACKEND"] = "db"
+    os.environ["CACHE_BUS_POLL_INTERVAL"] = str(args.poll_interval)
+    asyncio.run(run_bus_worker(index, args, barrier, results))
+
+def bench_bus(args):
+    """缓存失效总线的跨进程传播延迟：多个进程通过db传输互相发布事件（使用独立的测试数据库）"""
+    import multiprocessing
+    
+    async def prepare():
+        engine, _ = await create_test_database(args.database_url, 0)
+        await engine.dispose()
+    asyncio.run(prepare())
+    
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=bus_worker, args=(args.database_url, index, args, barrier, results))
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    outputs = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    
+    # 每个进程应收到其他所有进程发布的每个事件（主键index * events + i），缺失说明事件被永久漏掉
+    published = {index: set(range(index * args.events, (index + 1) * args.events)) for index in range(args.workers)}
+    missing = 0
+    for index, _, received in outputs:
+        expected_keys = set().union(*(keys for other, keys in published.items() if other != index))
+        lost = expected_keys - received
+        if lost:
+            print(f"  进程{index}缺失{len(lost)}个事件：{sorted(lost)[:20]}")
+        missing += len(lost)
+    latencies = sorted(value for _, values, _ in outputs for value in values)
+    
+    expected = args.events * args.workers * (args.workers - 1)
+    print(f"{args.workers}个进程，每个发布{args.events}个事件，轮询间隔{args.poll_interval}秒")
+    print(f"  收到{expected - missing}/{expected}个其他进程的事件")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"  传播延迟(ms)：平均{mean(latencies):.1f}，中位数{median(latencies):.1f}，P95 {p95:.1f}，最大{max(latencies):.1f}")
+    if missing:
+        raise SystemExit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="后端性能基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    password = subparsers.add_parser("password", help="密码校验耗时")
+    password.add_argument("--rounds", type=int, nargs="+", default=[10000, 29000, 100000, 300000])
+    password.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 12])
+    password.add_argument("--repeat", type=int, default=20)
+    password.add_argument("--password", default="admin123")
+    password.set_defaults(func=bench_password)
+    
+    archive = subparsers.add_parser("archive", help="禁用用户归档前后的查询耗时")
+    archive.add_argument("--database-url", default="sqlite+aiosqlite:///./benchmark.db", help="测试数据库，会清空重建所有表")
+    archive.add_argument("--users", type=int, default=100000)
+    archive.add_argument("--disabled", type=float, default=0.7, help="禁用用户比例")
+    archive.add_argument("--batch", type=int, default=1000)
+    archive.add_argument("--offset", type=int, default=1000, help="分页查询的偏移量")
+    archive.add_argument("--repeat", type=int, default=20)
+    archive.set_defaults(func=bench_archive)
+    
+    throughput = subparsers.add_parser("throughput", help="混合读写吞吐量")
+    throughput.add_argument("--database-url", default="sqlite+aiosqlite:///./benchmark.db", help="测试数据库，会清空重建所有表")
+    throughput.add_argument("--users", type=int, default=10000)
+    throughput.add_argument("--concurrency", type=int, default=20)
+    throughput.add_argument("--write-ratio", type=float, default=0.2)
+    throughput.add_argument("--seconds", type=float, default=10)
+    throughput.add_argument("--no-serialize", dest="serialize", action="store_false", help="SQLite不串行化写事务")
+    throughput.set_defaults(func=bench_throughput)
+    
+    suggest = subparsers.add_parser("suggest", help="用户联想的前缀索引与LIKE查询")
+    suggest.add_argument("--database-url", default="sqlite+aiosqlite:///./benchmark.db", help="测试数据库，会清空重建所有表")
+    suggest.add_argument("--users", type=int, default=1000000)
+    suggest.add_argument("--repeat", type=int, default=50)
+    suggest.add_argument("--compact-threshold", type=int, default=10000)
+    suggest.set_defaults(func=bench_suggest)
+    
+    columnar = subparsers.add_parser("columnar", help="列表接口字典格式与列式格式的响应大小和序列化耗时")
+    columnar.add_argument("--database-url", default="sqlite+aiosqlite:///./benchmark.db", help="测试数据库，会清空重建所有表")
+    columnar.add_argument("--users", type=int, default=10000)
+    columnar.add_argument("--rows", type=int, nargs="+", default=[20, 100, 1000], help="每次返回的行数")
+    columnar.add_argument("--repeat", type=int, default=50)
+    columnar.set_defaults(func=bench_columnar)
+    
+    bus = subparsers.add_parser("bus", help="缓存失效总线的跨进程传播延迟")
+    bus.add_argument("--database-url", default="sqlite+aiosqlite:///./benchmark.db", help="测试数据库，会清空重建所有表")
+    bus.add_argument("--workers", type=int, default=4, help="进程数")
+    bus.add_argument("--events", type=int, default=50, help="每个进程发布的事件数")
+    bus.add_argument("--interval", type=float, default=0.05, help="同一进程两次发布的间隔（秒），为0时各进程连续并发发布")
+    bus.add_argument("--poll-interval", type=float, default=0.5, help="db传输的轮询间隔（秒）")
+    bus.set_defaults(func=bench_bus)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from fastapi import Query, Request
+
+from utils.response import success_response
+
+# 通过Accept请求列式格式时使用的媒体类型
+COLUMNAR_MEDIA_TYPE = "application/vnd.columnar+json"
+
+def columnar_requested(
+    request: Request,
+    format: Optional[str] = Query(default=None, description="响应格式：columns为列式（列名只出现一次，每行为值数组）")
+) -> bool:
+    """路由依赖：客户端是否请求列式格式（format=columns或Accept包含列式媒体类型）"""
+    return format == "columns" or COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+
+def columnar(columns: Iterable[str], rows: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+    """列式数据：columns为列名，rows为与列名一一对应的值数组，直接由查询结果行构建"""
+    return {"columns": list(columns), "rows": [tuple(row) for row in rows]}
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    raise TypeError(f"无法序列化的类型：{type(value).__name__}")
+
+def encode_columnar(data: Any) -> bytes:
+    """序列化列式响应：值已是基本类型，跳过jsonable_encoder逐层遍历，时间按列表接口的格式输出
+
+    响应外层取自success_response，data在导出后再填入，避免model_dump遍历复制所有行
+    """
+    envelope = success_response().model_dump()
+    envelope["data"] = data
+    return json.dumps(
+        envelope,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_encode_value,
+    ).encode("utf-8")